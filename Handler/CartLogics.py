@@ -1,4 +1,3 @@
-from django.db import transaction
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
@@ -6,6 +5,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from Handler.ApiViewHandler import *
 from api_app.models import *
+from api_app.carts import cart_lines, cart_total, change_line_quantity
+from api_app.serializers import CartLineSerializer
 
 # Create Cart Logic
 @api_view(["POST"])
@@ -53,23 +54,15 @@ def GetAllCart(request):
 def GetCartById(request, id):
     cart = get_object_or_404(CartModel, id=id, user=request.user)
 
-    items = CartItemModel.objects.filter(cart=cart)
-
-    cart_items = []
-    for item in items:
-        cart_items.append({
-            "item_id": item.id,
-            "variant": str(item.variant),
-            "quantity": item.quantity,
-            "price": item.price,
-            "total_price": item.total_price,
-        })
+    lines = list(cart_lines(cart))
+    serializer = CartLineSerializer(lines, many=True, context={"request": request})
 
     return Response(
         {
             "status": True,
             "cart_id": cart.id,
-            "items": cart_items,
+            "items": serializer.data,
+            "total_amount": cart_total(lines),
         },
         status=status.HTTP_200_OK,
     )
@@ -83,7 +76,6 @@ def UpdateCart(request, id):
     cart = get_object_or_404(CartModel, id=id, user=request.user)
 
     variant_id = request.data.get("variant_id")
-    quantity = int(request.data.get("quantity", 1))
 
     if not variant_id:
         return Response(
@@ -91,20 +83,36 @@ def UpdateCart(request, id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    variant = get_object_or_404(ProductVariantModel, id=variant_id)
+    try:
+        quantity = int(request.data.get("quantity", 1))
+    except (TypeError, ValueError):
+        return Response(
+            {"status": False, "message": "Invalid quantity"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if quantity < 1:
+        return Response(
+            {"status": False, "message": "Quantity must be at least 1"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    variant = get_object_or_404(
+        ProductVariantModel.objects.select_related("product"), id=variant_id
+    )
 
     try:
-        with transaction.atomic():
-            cart_item, created = CartItemModel.objects.get_or_create(
-                cart=cart,
-                variant=variant,
-                defaults={"quantity": quantity},
+        # Increment and stock check in one guarded upsert
+        cart_item = change_line_quantity(cart, variant, quantity)
+        if cart_item is None:
+            return Response(
+                {
+                    "status": False,
+                    "message": f"Only {max(variant.available, 0)} items available",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
-
     except Exception as e:
         return Response(
             {
@@ -2,6 +2,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction, IntegrityError
 from django.utils.text import slugify
+from functools import partial
+from api_app.unique import save_unique
 from django.contrib.auth.hashers import make_password
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
@@ -68,6 +70,7 @@ def handle_addition(
             try:
                 with transaction.atomic():
                     instance = form.save(commit=False)
+                    save = instance.save
 
                     # Extra validation for User
                     if model_class.__name__ == "User":
@@ -76,17 +79,14 @@ def handle_addition(
                         # Auto-generate username if not present
                         if not instance.username:
                             base_username = f"{instance.first_name}{instance.last_name}".lower()
-                            username = base_username
-                            counter = 1
-                            while model_class.objects.filter(username=username).exists():
-                                username = f"{base_username}{counter}"
-                                counter += 1
-                            instance.username = username
+                            save = partial(
+                                save_unique, instance, "username", base_username, separator=""
+                            )
                         instance.is_staff = True
                         instance.is_superuser = False
                         instance.is_user = False
 
-                    instance.save()
+                    save()
                     form.save_m2m()
                     messages.success(request, success_msg)
                     return redirect(redirect_url)
@@ -22,6 +22,7 @@ custom_urlpatterns = [
     path("auth/login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     # order
+    path("orders/checkout/", api_views.CheckoutStartAPI.as_view(), name="api_checkout_start"),
     path("orders/place/", api_views.PlaceOrderAPI.as_view(), name="api_place_order"),
     path("orders/my/", api_views.MyOrdersAPI.as_view(), name="api_my_orders"),
     path("orders/<int:order_id>/",api_views.OrderDetailAPI.as_view(),name="api_order_detail",),
@@ -31,10 +32,13 @@ custom_urlpatterns = [
     path("orders/<int:order_id>/update-payment/",api_views.UpdatePaymentStatusAPI.as_view(),name="admin_payment_update",),
     # cart
     path("cart/", api_views.CartViewAPI.as_view(), name="api_cart"),
+    path("cart/summary/", api_views.CartSummaryAPI.as_view(), name="api_cart_summary"),
     path("cart/add/", api_views.AddToCartAPI.as_view(), name="api_cart_add"),
     path("cart/remove/", api_views.RemoveCartItemAPI.as_view(), name="api_cart_remove"),
     path("cart/update/", api_views.UpdateCartItemAPI.as_view(), name="api_cart_update"),
+    path("cart/batch/", api_views.CartBatchAPI.as_view(), name="api_cart_batch"),
     path("cart/clear/", api_views.ClearCartAPI.as_view(), name="api_cart_clear"),
+    path("cart/guest/", api_views.GuestCartAPI.as_view(), name="api_cart_guest"),
 ]
 
 urlpatterns = [
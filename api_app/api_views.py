@@ -2,18 +2,50 @@ from rest_framework.permissions import AllowAny, IsAuthenticated, BasePermission
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.authtoken.models import Token
 from rest_framework import status, permissions
 from django.shortcuts import get_object_or_404
 from .permissions import IsStaffOrIsSuperUser
+from .pagination import KeysetCursorPagination
+from .search import ProductSearchFilter
+from .facets import annotate_availability, compute_facets
+from .catalog_import import CatalogImporter, iter_rows
+from .related import RELATED_LIMIT
+from .carts import (
+    apply_cart_operations,
+    cart_lines,
+    cart_total,
+    change_line_quantity,
+)
+from .guest_carts import (
+    GuestCartMergeMixin,
+    apply_guest_operations,
+    clear_guest_cart,
+    get_guest_cart,
+    guest_lines,
+    new_token,
+    request_token,
+)
+from .pricing import bulk_reprice
+from .checkout import place_order
+from .reservations import release_cart, reserve_cart
+from .exports import StreamingExportMixin
+from .filters import OrderFilter, ProductFilter
+from .conditional import ConditionalGetMixin
+from .lookups import SlugLookupMixin
+from .response_cache import CachedResponseMixin
+from . import response_cache
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from Handler.ApiViewHandler import *
 from rest_framework import viewsets
 from rest_framework import filters
-from django.db import transaction
+from django.core.cache import cache
+from django.conf import settings
+import hashlib
 from api_app.serializers import *
 from api_app.models import *
 
@@ -52,6 +84,7 @@ class RegisterAPI(generics.CreateAPIView):
 class UserViewSet(viewsets.ModelViewSet):
     queryset = UserModel.objects.all()
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ["username", "email", "phone_number"]
 
@@ -85,10 +118,21 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 # CATEGORY VIEWSET
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SlugLookupMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = CategoryModel.objects.all()
     serializer_class = CategorySerializer
     authentication_classes = [JWTAuthentication]
+    slug_cache_prefix = "category"
+
+    def get_queryset(self):
+        if self.action == "list":
+            return CategoryModel.objects.defer("description")
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return CategoryListSerializer
+        return CategorySerializer
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -97,11 +141,16 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
 
 # BRAND VIEWSET
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = BrandModel.objects.all()
     serializer_class = BrandSerializer
     authentication_classes = [JWTAuthentication]
 
+    def get_queryset(self):
+        if self.action == "list":
+            return BrandModel.objects.defer("description")
+        return super().get_queryset()
+
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             return [IsAuthenticated()]
@@ -109,32 +158,181 @@ class BrandViewSet(viewsets.ModelViewSet):
 
 
 # PRODUCT VIEWSET
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    SlugLookupMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    StreamingExportMixin,
+    viewsets.ModelViewSet,
+):
     queryset = ProductModel.objects.select_related(
         "category", "brand"
     ).prefetch_related("images", "variants", "reviews", "reviews__user")
     serializer_class = ProductSerializer
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        ProductSearchFilter,
         filters.OrderingFilter,
     ]
-    filterset_fields = ["category", "brand", "is_featured", "is_active"]
+    filterset_class = ProductFilter
+    response_cache_prefix = "product"
+    slug_cache_prefix = "product"
+    export_kind = "products"
+    conditional_timestamp_fields = [
+        "updated_at",
+        "category__updated_at",
+        "brand__updated_at",
+    ]
     search_fields = ["name", "description", "brand__name", "category__name"]
-    ordering_fields = ["price", "created_at", "name", "discount_percent"]
+    ordering_fields = [
+        "price",
+        "discounted_price",
+        "created_at",
+        "name",
+        "discount_percent",
+        "rating_avg",
+        "rating_count",
+    ]
+
+    # Only the columns ProductListSerializer needs, plus the ones used for
+    # filtering/searching/ordering.
+    list_only_fields = [
+        "id",
+        "slug",
+        "name",
+        "image",
+        "price",
+        "discount_percent",
+        "discounted_price",
+        "category_id",
+        "brand_id",
+        "is_featured",
+        "is_active",
+        "rating_avg",
+        "rating_count",
+        "excerpt",
+        "created_at",
+    ]
+
+    @property
+    def ordering(self):
+        # Rank full-text matches best-first unless ?ordering= overrides it
+        request = getattr(self, "request", None)
+        if request is not None and ProductSearchFilter().is_ranked(request):
+            return ["search_rank"]
+        return None
+
+    def get_queryset(self):
+        if self.action == "list":
+            return annotate_availability(
+                ProductModel.objects.only(*self.list_only_fields)
+            )
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ProductListSerializer
+        return ProductSerializer
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "facets", "related"]:
             return [IsAuthenticated()]
         return [IsStaffOrIsSuperUser()]
 
+    # Query params that don't change which products match
+    facet_ignored_params = {"cursor", "page_size", "ordering"}
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.facet_ignored_params
+            for value in values
+        )
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        version = response_cache.get_version(
+            response_cache.list_version_key(self.response_cache_prefix)
+        )
+        cache_key = f"product-facets:{version}:{digest}"
+
+        data = cache.get(cache_key)
+        if data is None:
+            queryset = ProductModel.objects.all()
+            for backend in [DjangoFilterBackend, ProductSearchFilter]:
+                queryset = backend().filter_queryset(request, queryset, self)
+            products = ProductModel.objects.filter(pk__in=queryset.values("pk"))
+            data = compute_facets(products)
+            cache.set(
+                cache_key,
+                data,
+                getattr(settings, "PRODUCT_FACETS_CACHE_TIMEOUT", 300),
+            )
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def related(self, request, slug=None):
+        try:
+            limit = int(request.query_params.get("limit", RELATED_LIMIT))
+        except ValueError:
+            limit = RELATED_LIMIT
+        limit = max(min(limit, RELATED_LIMIT), 1)
+
+        # Answered from the precomputed index (api_app.related) in one query
+        products = (
+            annotate_availability(ProductModel.objects.only(*self.list_only_fields))
+            .filter(
+                **{
+                    f"related_from__product__{field}": value
+                    for field, value in self.get_lookup_filter().items()
+                }
+            )
+            .order_by("-related_from__score", "id")[:limit]
+        )
+        serializer = ProductListSerializer(
+            products, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], url_path="bulk-price")
+    def bulk_price(self, request):
+        serializer = BulkPriceUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        counts = bulk_reprice(serializer.get_products(), **serializer.get_changes())
+        return Response(counts, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_catalog(self, request):
+        serializer = CatalogImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        importer = CatalogImporter(
+            batch_size=data["batch_size"], create_missing=data["create_missing"]
+        )
+        report = importer.run(iter_rows(data["file"].file, data["format"]))
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get", "delete"], url_path="cache-stats")
+    def cache_stats(self, request):
+        if request.method == "DELETE":
+            response_cache.reset_stats()
+        return Response(response_cache.get_stats())
+
 
 # MORE IMAGES VIEWSET
 class MoreImagesViewSet(viewsets.ModelViewSet):
     queryset = ProductImageModel.objects.all()
     serializer_class = ProductImageSerializer
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -147,6 +345,7 @@ class ProductVariantViewSet(viewsets.ModelViewSet):
     queryset = ProductVariantModel.objects.select_related("product").all()
     serializer_class = ProductVariantSerializer
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
     permission_classes = [IsStaffOrIsSuperUser]
 
     def get_permissions(self):
@@ -156,10 +355,22 @@ class ProductVariantViewSet(viewsets.ModelViewSet):
 
 
 # BLOG VIEWSET
-class BlogViewSet(viewsets.ModelViewSet):
-    queryset = BlogModel.objects.select_related("author").all()
+class BlogViewSet(SlugLookupMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = BlogModel.objects.all()
     serializer_class = BlogSerializer
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
+    slug_cache_prefix = "blog"
+
+    def get_queryset(self):
+        if self.action == "list":
+            return BlogModel.objects.defer("content")
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return BlogListSerializer
+        return BlogSerializer
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -168,13 +379,15 @@ class BlogViewSet(viewsets.ModelViewSet):
 
 
 # ORDER VIEWSET
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     queryset = OrderModel.objects.select_related(
         "user", "shipping_address", "payment"
     ).prefetch_related("items")
     serializer_class = OrderSerializer
     authentication_classes = [JWTAuthentication]
+    pagination_class = KeysetCursorPagination
     permission_classes = [IsStaffOrIsSuperUser]
+    export_kind = "orders"
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -186,12 +399,12 @@ class OrderViewSet(viewsets.ModelViewSet):
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
-    filterset_fields = ["status", "payment__payment_status", "delivery_type"]
+    filterset_class = OrderFilter
     search_fields = ["id", "user__username", "user__email", "shipping_address__phone"]
 
 
 # OTHER DETAIL VIEWSET
-class OtherDetailViewSet(viewsets.ModelViewSet):
+class OtherDetailViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = OtherDetailModel.objects.all()
     serializer_class = OtherdetailSerializer
     authentication_classes = [JWTAuthentication]
@@ -255,7 +468,7 @@ class CustomAuthToken(ObtainAuthToken):
         )
 
 
-class PlaceOrderAPI(APIView):
+class PlaceOrderAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -266,74 +479,66 @@ class PlaceOrderAPI(APIView):
         payment_method = request.data.get("payment_method", "cod")
 
         cart = CartModel.objects.filter(user=user, is_active=True).first()
-        if not cart or not cart.items.exists():
+        if not cart or not cart.item_count:
             return Response({"detail": "Your cart is empty."}, status=400)
-            
+
         shipping_address = ShippingAddressModel.objects.filter(user=user).last()
         if not shipping_address:
             return Response({"detail": "Shipping address required."}, status=400)
 
         try:
-            with transaction.atomic():
-                total_amount = sum(
-                    item.price * item.quantity for item in cart.items.all()
-                )
-                
-                # You can adjust shipping fees based on delivery_type here
-                shipping_fee = 0 if total_amount > 5000 else 150
-                if delivery_type == "express":
-                    shipping_fee += 200 # Example extra charge
-                
-                final_total = total_amount + shipping_fee
-
-                # 2. Save delivery_type to the Order
-                order = OrderModel.objects.create(
-                    user=user,
-                    shipping_address=shipping_address,
-                    total_amount=final_total,
-                    delivery_type=delivery_type, 
-                    status="pending",
-                )
+            # 2. Save delivery_type to the Order, with its payment record
+            order = place_order(
+                cart,
+                user,
+                shipping_address,
+                delivery_type=delivery_type,
+                payment_method=payment_method,
+                charge_shipping=True,
+            )
+        except serializers.ValidationError as e:
+            return Response(
+                {"detail": e.detail[0]}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-                # 3. Create the Payment record linked to this order
-                PaymentModel.objects.create(
-                    order=order,
-                    payment_method=payment_method,
-                    payment_status="pending"
-                )
+        return Response(
+            {
+                "detail": "Order placed successfully!",
+                "order_id": order.id,
+                "total_amount": float(order.total_amount),
+            },
+            status=status.HTTP_201_CREATED,
+        )
 
-                for cart_item in cart.items.all():
-                    if not cart_item.variant.is_made_to_order:
-                        if cart_item.variant.stock < cart_item.quantity:
-                            raise Exception(
-                                f"Item {cart_item.variant.product.name} went out of stock."
-                            )
-
-                        cart_item.variant.stock -= cart_item.quantity
-                        cart_item.variant.save()
-
-                    OrderItemModel.objects.create(
-                        order=order,
-                        product_name=cart_item.variant.product.name,
-                        variant_details=f"{cart_item.variant.material} - {cart_item.variant.color}",
-                        price=cart_item.price,
-                        quantity=cart_item.quantity,
-                    )
-                
-                cart.is_active = False
-                cart.save()
 
-                return Response(
-                    {
-                        "detail": "Order placed successfully!",
-                        "order_id": order.id,
-                        "total_amount": float(final_total),
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
+class CheckoutStartAPI(GuestCartMergeMixin, APIView):
+    """
+    Hold the active cart's stock while the shopper goes through payment
+    (POST; again to extend), or let it go (DELETE). Placing the order
+    turns the reservations into stock decrements.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        cart = get_object_or_404(CartModel, user=request.user, is_active=True)
+        reservations = reserve_cart(cart)
+        return Response(
+            {
+                "expires_at": reservations[0].expires_at if reservations else None,
+                "reservations": [
+                    {"variant_id": r.variant_id, "quantity": r.quantity}
+                    for r in reservations
+                ],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def delete(self, request):
+        cart = get_object_or_404(CartModel, user=request.user, is_active=True)
+        release_cart(cart)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class ShippingAddressViewSet(viewsets.ModelViewSet):
     queryset = ShippingAddressModel.objects.all()
@@ -370,34 +575,56 @@ class OrderDetailAPI(APIView):
         return Response(serializer.data)
 
 
-class CartViewAPI(APIView):
+class CartViewAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        cart, _ = CartModel.objects.prefetch_related(
-            "items",
-            "items__cart",
-            "items__variant",
-            "items__variant__product",
-            "items__variant__product__images",
-        ).get_or_create(user=request.user, is_active=True)
+        # Viewing doesn't create a cart; the first add does
+        cart = CartModel.objects.filter(user=request.user, is_active=True).first()
+        if cart is None:
+            return Response({"cart_items": [], "item_count": 0, "total_amount": 0})
+
+        serializer = CartLineSerializer(
+            cart_lines(cart), many=True, context={"request": request}
+        )
+        return Response(
+            {
+                "cart_items": serializer.data,
+                "item_count": cart.item_count,
+                "total_amount": cart.subtotal,
+            }
+        )
 
-        serializer = CartItemReadSerializer(cart.items.all(), many=True)
-        total_amount = sum(item.total_price for item in cart.items.all())
 
-        return Response({"cart_items": serializer.data, "total_amount": total_amount})
+class CartSummaryAPI(GuestCartMergeMixin, APIView):
+    """Item count and subtotal for the mini-cart badge, from one row."""
 
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        summary = (
+            CartModel.objects.filter(user=request.user, is_active=True)
+            .values("item_count", "subtotal")
+            .first()
+        )
+        return Response(summary or {"item_count": 0, "subtotal": 0})
 
-class AddToCartAPI(APIView):
+
+class AddToCartAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         product_id = request.data.get("product_id")
-        quantity = int(request.data.get("quantity", 1))
-
         if not product_id:
             return Response({"detail": "product_id is required."}, status=400)
 
+        try:
+            quantity = int(request.data.get("quantity", 1))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Invalid quantity"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
         product = get_object_or_404(ProductModel, id=product_id)
         variant = product.variants.first()
 
@@ -405,33 +632,87 @@ class AddToCartAPI(APIView):
             return Response(
                 {"detail": "No variant found for this product."}, status=404
             )
+        if quantity < 1:
+            return Response(
+                {"detail": "Quantity must be at least 1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         cart, _ = CartModel.objects.get_or_create(user=request.user, is_active=True)
 
-        cart_item, created = CartItemModel.objects.get_or_create(
-            cart=cart,
-            variant=variant,
-            defaults={
-                "quantity": 0,
-                "price": product.discounted_price,
-            },
-        )
-        new_total_quantity = cart_item.quantity + quantity
-        if not variant.is_made_to_order and new_total_quantity > variant.stock:
+        # Increment and stock check in one guarded upsert
+        line = change_line_quantity(cart, variant, quantity)
+        if line is None:
+            available = max(variant.available, 0)
             return Response(
-                {"detail": f"Only {variant.stock} items available in total."},
+                {"detail": f"Only {available} items available in total."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 3. Update Item
-        cart_item.quantity = new_total_quantity
-        cart_item.price = product.discounted_price
-        cart_item.save()
-
-        serializer = CartItemReadSerializer(cart_item)
+        serializer = CartLineSerializer(line, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class UpdateCartItemAPI(APIView):
+class CartBatchAPI(GuestCartMergeMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart, _ = CartModel.objects.get_or_create(user=request.user, is_active=True)
+        apply_cart_operations(cart, serializer.validated_data["operations"])
+
+        lines = list(cart_lines(cart))
+        serializer = CartLineSerializer(
+            lines, many=True, context={"request": request}
+        )
+        return Response(
+            {"cart_items": serializer.data, "total_amount": cart_total(lines)}
+        )
+
+
+class GuestCartAPI(APIView):
+    """
+    Cart for anonymous shoppers, kept in the cache under the opaque token
+    sent back as `cart_token` (pass it as the X-Cart-Token header). No
+    rows are written until the shopper authenticates and the cart is
+    merged into their own (GuestCartMergeMixin).
+    """
+
+    permission_classes = [AllowAny]
+
+    def _response(self, request, token, lines):
+        serializer = CartLineSerializer(
+            lines, many=True, context={"request": request}
+        )
+        return Response(
+            {
+                "cart_token": token,
+                "cart_items": serializer.data,
+                "total_amount": cart_total(lines),
+            }
+        )
+
+    def get(self, request):
+        token = request_token(request)
+        return self._response(request, token, guest_lines(get_guest_cart(token)))
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        token = request_token(request) or new_token()
+        lines = apply_guest_operations(token, serializer.validated_data["operations"])
+        return self._response(request, token, lines)
+
+    def delete(self, request):
+        token = request_token(request)
+        if token:
+            clear_guest_cart(token)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UpdateCartItemAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -453,35 +734,34 @@ class UpdateCartItemAPI(APIView):
 
         # Ensure we only update items belonging to the logged-in user's active cart
         cart_item = get_object_or_404(
-            CartItemModel, id=item_id, cart__user=request.user, cart__is_active=True
+            CartItemModel.objects.select_related("variant__product"),
+            id=item_id,
+            cart__user=request.user,
+            cart__is_active=True,
         )
         variant = cart_item.variant
 
-        # Check stock levels
-        if not variant.is_made_to_order and quantity > variant.stock:
+        # Quantity and stock check in one guarded upsert
+        line = change_line_quantity(cart_item.cart_id, variant, quantity, mode="set")
+        if line is None:
             return Response(
-                {"detail": f"Only {variant.stock} items in stock"},
+                {"detail": f"Only {max(variant.available, 0)} items available"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with transaction.atomic():
-            cart_item.quantity = quantity
-            cart_item.price = variant.product.discounted_price
-            cart_item.save()
-
-            return Response(
-                {
-                    "detail": "Cart updated successfully",
-                    "item_id": cart_item.id,
-                    "quantity": cart_item.quantity,
-                    "unit_price": float(cart_item.price),
-                    "total_price": float(cart_item.price * cart_item.quantity),
-                },
-                status=status.HTTP_200_OK,
-            )
+        return Response(
+            {
+                "detail": "Cart updated successfully",
+                "item_id": line.id,
+                "quantity": line.quantity,
+                "unit_price": float(line.price),
+                "total_price": float(line.total_price),
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
-class RemoveCartItemAPI(APIView):
+class RemoveCartItemAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -494,7 +774,7 @@ class RemoveCartItemAPI(APIView):
         )
 
 
-class ClearCartAPI(APIView):
+class ClearCartAPI(GuestCartMergeMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -41,3 +41,4 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         post_migrate.connect(create_default_superuser, sender=self)
+        from . import signals  # noqa: F401
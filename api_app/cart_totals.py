@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def totals_update(item_model):
+    """UPDATE kwargs recomputing a cart's item_count / subtotal from its lines."""
+    lines = item_model.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    return {
+        "item_count": Coalesce(
+            Subquery(lines.annotate(total=Sum("quantity")).values("total")),
+            0,
+            output_field=IntegerField(),
+        ),
+        "subtotal": Coalesce(
+            Subquery(
+                lines.annotate(total=Sum(F("price") * F("quantity"))).values("total")
+            ),
+            Decimal("0"),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
+
+
+def recompute_totals(carts, item_model):
+    """
+    Set item_count / subtotal of every cart in the `carts` queryset with
+    one UPDATE.
+    """
+    return carts.update(**totals_update(item_model))
+
+
+def refresh_cart_totals(cart_ids):
+    """
+    Bring the totals of `cart_ids` (an id, an iterable of ids or an id
+    queryset) back in line with their CartItemModel rows. Called in the
+    same transaction as every write to the lines.
+    """
+    from api_app.models import CartItemModel, CartModel
+
+    if isinstance(cart_ids, int):
+        cart_ids = [cart_ids]
+    return recompute_totals(CartModel.objects.filter(pk__in=cart_ids), CartItemModel)
@@ -0,0 +1,292 @@
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from api_app.cart_totals import refresh_cart_totals
+from api_app.models import (
+    CartItemModel,
+    CartModel,
+    ProductModel,
+    ProductVariantModel,
+    StockReservationModel,
+)
+from api_app.reservations import reserved_quantity, with_available_stock
+
+# Columns a compact cart line (CartLineSerializer) reads
+CART_LINE_FIELDS = [
+    "id",
+    "cart_id",
+    "quantity",
+    "price",
+    "variant__id",
+    "variant__product_id",
+    "variant__material",
+    "variant__color",
+    "variant__stock",
+    "variant__is_made_to_order",
+    "variant__product__id",
+    "variant__product__name",
+    "variant__product__slug",
+    "variant__product__image",
+]
+
+
+def cart_lines(cart):
+    """
+    A cart's lines with their variant and product in one joined query,
+    annotated with `available` (the variant's stock less other carts'
+    reservations).
+    """
+    return (
+        CartItemModel.objects.filter(cart=cart)
+        .select_related("variant__product")
+        .only(*CART_LINE_FIELDS)
+        .annotate(
+            available=F("variant__stock")
+            - reserved_quantity(
+                timezone.now(), exclude_cart=cart, variant_ref="variant_id"
+            )
+        )
+        .order_by("id")
+    )
+
+
+def cart_total(lines):
+    return sum((line.total_price for line in lines), 0)
+
+
+def final_quantities(operations, current):
+    """Replay `operations` over the current {variant_id: quantity}."""
+    final = {}
+    for operation in operations:
+        variant_id = operation["variant_id"]
+        quantity = final.get(variant_id, current.get(variant_id, 0))
+        if operation["op"] == "add":
+            quantity += operation["quantity"]
+        elif operation["op"] == "set":
+            quantity = operation["quantity"]
+        else:
+            quantity = 0
+        final[variant_id] = quantity
+    return final
+
+
+def load_variants(variant_ids, cart=None):
+    """
+    {id: variant} with the product's price and `available` stock (less
+    reservations other than `cart`'s), in one query.
+    """
+    return with_available_stock(
+        ProductVariantModel.objects.select_related("product").only(
+            "stock", "is_made_to_order", "is_active", "product__discounted_price"
+        ),
+        exclude_cart=cart,
+    ).in_bulk(variant_ids)
+
+
+def validate_quantities(operations, final, variants):
+    """Raise ValidationError keyed by operation index for unfillable lines."""
+    errors = {}
+    for index, operation in enumerate(operations):
+        variant = variants.get(operation["variant_id"])
+        quantity = final[operation["variant_id"]]
+        if variant is None:
+            errors[index] = "Variant not found."
+        elif quantity and not variant.is_active:
+            errors[index] = "Variant is not available."
+        elif quantity and not variant.is_made_to_order and quantity > variant.available:
+            errors[index] = f"Only {max(variant.available, 0)} items available."
+    if errors:
+        raise serializers.ValidationError({"operations": errors})
+
+
+def upsert_lines(cart, quantities, variants):
+    """Write {variant_id: quantity} onto `cart` with one bulk upsert."""
+    CartItemModel.objects.bulk_create(
+        [
+            CartItemModel(
+                cart=cart,
+                variant_id=variant_id,
+                quantity=quantity,
+                price=variants[variant_id].product.discounted_price,
+            )
+            for variant_id, quantity in quantities.items()
+            if quantity
+        ],
+        update_conflicts=True,
+        unique_fields=["cart", "variant"],
+        update_fields=["quantity", "price", "updated_at"],
+    )
+
+
+def lock_cart(cart):
+    """
+    Lock the cart row (a cart or its id) for the rest of the transaction,
+    for writes that read the lines before writing absolute quantities.
+    """
+    CartModel.objects.select_for_update().only("pk").get(pk=getattr(cart, "pk", cart))
+
+
+def apply_cart_operations(cart, operations):
+    """
+    Apply a batch of {variant_id, quantity, op} operations (op: add, set
+    or remove) to `cart` atomically.
+
+    Existing lines and the touched variants (with their product's price)
+    are read with one query each and every resulting quantity is checked
+    against stock before anything is written; then the surviving lines
+    are upserted with one bulk_create, emptied lines deleted with one
+    DELETE and the cart's totals refreshed with one UPDATE. Raises
+    ValidationError (keyed by operation index) without writing on
+    failure.
+
+    The quantities written are absolute, so the cart row is locked first
+    (lock_cart) to keep a concurrent batch or add-to-cart from landing
+    between the read and the upsert.
+    """
+    variant_ids = {operation["variant_id"] for operation in operations}
+
+    with transaction.atomic():
+        lock_cart(cart)
+        current = dict(
+            CartItemModel.objects.filter(
+                cart=cart, variant_id__in=variant_ids
+            ).values_list("variant_id", "quantity")
+        )
+        variants = load_variants(variant_ids, cart)
+        final = final_quantities(operations, current)
+        validate_quantities(operations, final, variants)
+
+        upsert_lines(cart, final, variants)
+        emptied = [variant_id for variant_id, quantity in final.items() if not quantity]
+        if emptied:
+            CartItemModel.objects.filter(cart=cart, variant_id__in=emptied).delete()
+        refresh_cart_totals(cart.pk)
+
+
+def _upsert_line_sql(mode):
+    """
+    INSERT ... SELECT ... ON CONFLICT (cart, variant) DO UPDATE for
+    change_line_quantity, guarded on both paths by stock less other
+    carts' unexpired reservations.
+
+    Placeholders: cart, quantity, now, now, variant, now, cart, quantity,
+    now, cart.
+    """
+    qn = connection.ops.quote_name
+    item = qn(CartItemModel._meta.db_table)
+    variants = qn(ProductVariantModel._meta.db_table)
+    products = qn(ProductModel._meta.db_table)
+    reserved = (
+        f"(SELECT COALESCE(SUM(r.quantity), 0) "
+        f"FROM {qn(StockReservationModel._meta.db_table)} r "
+        "WHERE r.variant_id = v.id AND r.expires_at > %s AND r.cart_id <> %s)"
+    )
+    if mode == "add":
+        new_quantity = f"{item}.quantity + excluded.quantity"
+    else:
+        new_quantity = "excluded.quantity"
+    return (
+        f"INSERT INTO {item} "
+        "(cart_id, variant_id, quantity, price, created_at, updated_at) "
+        "SELECT %s, v.id, %s, p.discounted_price, %s, %s "
+        f"FROM {variants} v INNER JOIN {products} p ON p.id = v.product_id "
+        f"WHERE v.id = %s AND (v.is_made_to_order OR v.stock - {reserved} >= %s) "
+        "ON CONFLICT (cart_id, variant_id) DO UPDATE SET "
+        f"quantity = {new_quantity}, "
+        "price = excluded.price, updated_at = excluded.updated_at "
+        f"WHERE (SELECT v.is_made_to_order OR v.stock - {reserved} >= {new_quantity} "
+        f"FROM {variants} v WHERE v.id = excluded.variant_id) "
+        "RETURNING id"
+    )
+
+
+def change_line_quantity(cart, variant, quantity, mode="add"):
+    """
+    Add `quantity` to (mode="add") or set it on (mode="set") the cart's
+    line for `variant`, inserting the line when there is none, in one
+    guarded upsert on the (cart, variant) unique constraint:
+
+        INSERT ... SELECT .. WHERE made_to_order OR available >= n
+        ON CONFLICT (cart, variant) DO UPDATE SET quantity = quantity + n
+        WHERE made_to_order OR available >= quantity + n
+        RETURNING id
+
+    where available is the variant's stock less other carts' unexpired
+    reservations. Stock is read by the statement itself, so concurrent
+    requests (including two first adds of the same variant) can't lose
+    increments or oversell. Where the database has row locks the cart
+    lock is taken first so a concurrent apply_cart_operations() can't
+    overwrite the change. The cart's totals are refreshed in the same
+    transaction.
+
+    Returns the line in cart_lines() shape, or None when stock is short
+    (variant.available then holds what could be had).
+    """
+    cart_id = getattr(cart, "pk", cart)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # apply_cart_operations writes absolute quantities under this lock
+            lock_cart(cart_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _upsert_line_sql(mode),
+                [cart_id, quantity, now, now, variant.pk, now, cart_id, quantity]
+                + [now, cart_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            variant.available = (
+                with_available_stock(
+                    ProductVariantModel.objects.filter(pk=variant.pk),
+                    exclude_cart=cart_id,
+                )
+                .values_list("available", flat=True)
+                .get()
+            )
+            return None
+        refresh_cart_totals(cart_id)
+
+    return cart_lines(cart_id).get(pk=row[0])
+
+
+def stale_carts(inactive_before, idle_before):
+    """
+    Carts that can go: checked-out / deactivated carts last touched before
+    `inactive_before`, and active carts (guest or not) with no cart or
+    line activity since `idle_before`.
+    """
+    recent_lines = CartItemModel.objects.filter(
+        cart=OuterRef("pk"), updated_at__gte=idle_before
+    )
+    return CartModel.objects.filter(
+        Q(is_active=False, updated_at__lt=inactive_before)
+        | (Q(is_active=True, updated_at__lt=idle_before) & ~Exists(recent_lines))
+    )
+
+
+def purge_carts(carts, batch_size=500):
+    """
+    Delete `carts` (with their lines) in primary-key order, `batch_size`
+    carts per transaction, so each DELETE holds its locks briefly.
+    Yields (carts, lines) deleted per batch.
+    """
+    last_pk = 0
+    while True:
+        ids = list(
+            carts.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic():
+            _, deleted = CartModel.objects.filter(pk__in=ids).delete()
+        last_pk = ids[-1]
+        yield (
+            deleted.get(CartModel._meta.label, 0),
+            deleted.get(CartItemModel._meta.label, 0),
+        )
@@ -0,0 +1,298 @@
+import csv
+import io
+import json
+import time
+from functools import partial
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils.text import slugify
+
+from api_app import related, search
+from api_app.excerpts import make_excerpt
+from api_app.signals import invalidate_product_cache
+from api_app.models import (
+    BrandModel,
+    CategoryModel,
+    ProductModel,
+    ProductVariantModel,
+)
+
+PRODUCT_UPDATE_FIELDS = [
+    "name",
+    "category",
+    "brand",
+    "price",
+    "discount_percent",
+    "warranty_years",
+    "description",
+    "excerpt",
+    "is_active",
+    "is_featured",
+    "updated_at",
+]
+VARIANT_FIELDS = [
+    "model",
+    "material",
+    "color",
+    "weight_kg",
+    "length",
+    "width",
+    "height",
+    "stock",
+    "is_made_to_order",
+    "delivery_days",
+]
+VARIANT_UPDATE_FIELDS = [
+    "model",
+    "weight_kg",
+    "length",
+    "width",
+    "height",
+    "stock",
+    "is_made_to_order",
+    "delivery_days",
+    "is_active",
+    "updated_at",
+]
+
+
+class RowError(ValueError):
+    pass
+
+
+# -------------------------------
+# READERS
+# -------------------------------
+def iter_csv(stream):
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, row
+
+
+def iter_jsonl(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, RowError(f"Invalid JSON: {e}")
+            continue
+        yield line_no, row
+
+
+def iter_rows(stream, fmt):
+    """`stream` may be text or binary (e.g. an uploaded file)."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt == "jsonl":
+        return iter_jsonl(stream)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+# -------------------------------
+# FIELD PARSING
+# -------------------------------
+def _text(row, key, default=""):
+    value = row.get(key)
+    if value is None:
+        return default
+    return str(value).strip()
+
+
+def _decimal(row, key, required=True):
+    value = _text(row, key)
+    if value == "":
+        if required:
+            raise RowError(f"'{key}' is required")
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"'{key}' must be a number")
+
+
+def _int(row, key, default):
+    value = _text(row, key)
+    if value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"'{key}' must be an integer")
+    if number < 0:
+        raise RowError(f"'{key}' must not be negative")
+    return number
+
+
+def _bool(row, key, default):
+    value = row.get(key)
+    if isinstance(value, bool):
+        return value
+    value = _text(row, key).lower()
+    if value == "":
+        return default
+    return value in ("1", "true", "yes", "y")
+
+
+# -------------------------------
+# IMPORTER
+# -------------------------------
+class CatalogImporter:
+    """
+    Upserts products (keyed by slug) and their variants (keyed by
+    product/material/color) in batches of `batch_size` rows.
+
+    Categories and brands are resolved from an in-memory map of name and
+    slug; with `create_missing` unknown ones are created on the fly.
+    """
+
+    def __init__(self, batch_size=1000, create_missing=False):
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.categories = self._lookup(CategoryModel)
+        self.brands = self._lookup(BrandModel)
+        self.stats = {"rows": 0, "products": 0, "variants": 0}
+        self.errors = []
+
+    @staticmethod
+    def _lookup(model):
+        lookup = {}
+        for pk, name, slug in model.objects.values_list("pk", "name", "slug"):
+            lookup[name.lower()] = pk
+            lookup[slug] = pk
+        return lookup
+
+    def _resolve(self, lookup, model, value):
+        for key in (value.lower(), slugify(value)):
+            if key in lookup:
+                return lookup[key]
+        if not self.create_missing:
+            raise RowError(f"Unknown {model.__name__[:-5].lower()}: {value}")
+        obj = model.objects.create(name=value)
+        lookup[value.lower()] = lookup[obj.slug] = obj.pk
+        return obj.pk
+
+    def parse(self, row):
+        name = _text(row, "name")
+        if not name:
+            raise RowError("'name' is required")
+        category = _text(row, "category")
+        if not category:
+            raise RowError("'category' is required")
+        brand = _text(row, "brand")
+
+        slug = _text(row, "slug") or slugify(name)
+        if not slug:
+            raise RowError("could not build a slug; pass 'slug' explicitly")
+
+        product = ProductModel(
+            name=name,
+            slug=slug,
+            category_id=self._resolve(self.categories, CategoryModel, category),
+            brand_id=self._resolve(self.brands, BrandModel, brand) if brand else None,
+            price=_decimal(row, "price"),
+            discount_percent=_int(row, "discount_percent", 0),
+            warranty_years=_int(row, "warranty_years", 0),
+            description=_text(row, "description"),
+            excerpt=make_excerpt(_text(row, "description")),
+            is_active=_bool(row, "is_active", True),
+            is_featured=_bool(row, "is_featured", False),
+        )
+        if product.discount_percent > 100:
+            raise RowError("'discount_percent' must be between 0 and 100")
+
+        variant = None
+        if any(_text(row, field) for field in VARIANT_FIELDS):
+            variant = ProductVariantModel(
+                model=_text(row, "model"),
+                material=_text(row, "material"),
+                color=_text(row, "color"),
+                weight_kg=_decimal(row, "weight_kg", required=False),
+                length=_text(row, "length") or None,
+                width=_text(row, "width") or None,
+                height=_text(row, "height") or None,
+                stock=_int(row, "stock", 0),
+                is_made_to_order=_bool(row, "is_made_to_order", False),
+                delivery_days=_int(row, "delivery_days", 7),
+                is_active=_bool(row, "variant_is_active", True),
+            )
+        return product, variant
+
+    def run(self, rows):
+        started = time.monotonic()
+        batch = []
+        for line_no, row in rows:
+            self.stats["rows"] += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                batch.append((line_no, *self.parse(row)))
+            except RowError as e:
+                self.errors.append({"line": line_no, "error": str(e)})
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+
+        elapsed = time.monotonic() - started
+        return {
+            **self.stats,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": (
+                round(self.stats["rows"] / elapsed, 1) if elapsed else None
+            ),
+        }
+
+    def flush(self, batch):
+        # Last row wins when a product/variant repeats inside the batch
+        products = {}
+        variants = {}
+        for _, product, variant in batch:
+            products[product.slug] = product
+            if variant is not None:
+                variants[(product.slug, variant.material, variant.color)] = variant
+
+        try:
+            self._write(products, variants)
+        except DatabaseError as e:
+            # The whole batch rolled back; report it against its line range
+            self.errors.append(
+                {"line": f"{batch[0][0]}-{batch[-1][0]}", "error": str(e)}
+            )
+            return
+
+        self.stats["products"] += len(products)
+        self.stats["variants"] += len(variants)
+
+    def _write(self, products, variants):
+        with transaction.atomic():
+            ProductModel.objects.bulk_create(
+                products.values(),
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=PRODUCT_UPDATE_FIELDS,
+            )
+            ids = dict(
+                ProductModel.objects.filter(slug__in=products).values_list("slug", "pk")
+            )
+            for (slug, _, _), variant in variants.items():
+                variant.product_id = ids[slug]
+            ProductVariantModel.objects.bulk_create(
+                variants.values(),
+                update_conflicts=True,
+                unique_fields=["product", "material", "color"],
+                update_fields=VARIANT_UPDATE_FIELDS,
+            )
+
+            # bulk_create skips signals, so sync the search index, caches and
+            # related-products lists here
+            search.index_products(ProductModel.objects.filter(pk__in=ids.values()))
+            invalidate_product_cache(ids.values())
+            transaction.on_commit(partial(related.refresh_for_products, list(ids.values())))
@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from api_app.models import (
+    CartItemModel,
+    CartModel,
+    OrderItemModel,
+    OrderModel,
+    PaymentModel,
+    ProductModel,
+    ProductVariantModel,
+    StockReservationModel,
+)
+from api_app.reservations import reserved_quantity
+from api_app.signals import invalidate_product_cache
+
+# Columns checkout reads from a cart line, its variant and product
+CHECKOUT_LINE_FIELDS = [
+    "id",
+    "cart_id",
+    "quantity",
+    "price",
+    "variant__id",
+    "variant__product_id",
+    "variant__material",
+    "variant__color",
+    "variant__stock",
+    "variant__is_made_to_order",
+    "variant__product__id",
+    "variant__product__name",
+]
+
+
+def shipping_fee(subtotal, delivery_type):
+    # Free standard shipping over 5000; express costs extra
+    fee = 0 if subtotal > 5000 else 150
+    if delivery_type == "express":
+        fee += 200
+    return fee
+
+
+def _decrement_stock(cart, quantities, now):
+    """
+    Take {variant_id: quantity} out of stock with one UPDATE that only
+    touches rows still holding enough once other carts' reservations are
+    set aside; returns whether all of them did.
+    """
+    if not quantities:
+        return True
+    quantity = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+    updated = (
+        ProductVariantModel.objects.filter(pk__in=quantities)
+        .alias(reserved=reserved_quantity(now, exclude_cart=cart))
+        .filter(stock__gte=quantity + F("reserved"))
+        .update(stock=F("stock") - quantity, updated_at=now)
+    )
+    return updated == len(quantities)
+
+
+def place_order(
+    cart,
+    user,
+    shipping_address,
+    delivery_type="standard",
+    payment_method="cod",
+    charge_shipping=False,
+):
+    """
+    Turn `cart` into an order in a fixed number of queries, whatever the
+    number of lines:
+
+    - close the cart with a conditional UPDATE (a concurrent checkout of
+      the same cart finds it already closed),
+    - fetch every line with its variant, product and available stock
+      (stock less other carts' unexpired reservations) in one locked
+      query,
+    - decrement stock for all stocked variants in one UPDATE guarded by
+      `stock >= quantity + reserved by others`,
+    - create the order and payment, bulk_create the order items, delete
+      the cart's own reservations and touch the products' updated_at.
+
+    Raises ValidationError and rolls everything back when the cart is
+    closed or empty or a line is short of stock.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        closed = CartModel.objects.filter(pk=cart.pk, is_active=True).update(
+            is_active=False, updated_at=now
+        )
+        if not closed:
+            raise serializers.ValidationError("Cart is no longer active.")
+
+        lines = list(
+            CartItemModel.objects.filter(cart_id=cart.pk)
+            .select_related("variant__product")
+            .only(*CHECKOUT_LINE_FIELDS)
+            .annotate(
+                available=F("variant__stock")
+                - reserved_quantity(now, exclude_cart=cart, variant_ref="variant_id")
+            )
+            .select_for_update(of=("self", "variant"))
+            .order_by("id")
+        )
+        if not lines:
+            raise serializers.ValidationError("Cart is empty.")
+
+        stocked = {}
+        for line in lines:
+            variant = line.variant
+            if variant.is_made_to_order:
+                continue
+            if line.available < line.quantity:
+                raise serializers.ValidationError(
+                    f"Not enough stock for {variant.product.name}."
+                )
+            stocked[variant.pk] = line.quantity
+        if not _decrement_stock(cart, stocked, now):
+            raise serializers.ValidationError("Stock changed, please try again.")
+
+        total_amount = sum((line.total_price for line in lines), 0)
+        if charge_shipping:
+            total_amount += shipping_fee(total_amount, delivery_type)
+
+        order = OrderModel.objects.create(
+            user=user,
+            shipping_address=shipping_address,
+            total_amount=total_amount,
+            delivery_type=delivery_type,
+            status="pending",
+        )
+        PaymentModel.objects.create(
+            order=order, payment_method=payment_method, payment_status="pending"
+        )
+        OrderItemModel.objects.bulk_create(
+            [
+                OrderItemModel(
+                    order=order,
+                    product_name=line.variant.product.name,
+                    variant_details=f"{line.variant.material} - {line.variant.color}",
+                    price=line.price,
+                    quantity=line.quantity,
+                )
+                for line in lines
+            ]
+        )
+        # The cart's reservations are now real decrements
+        StockReservationModel.objects.filter(cart_id=cart.pk).delete()
+
+        # Queryset updates skip signals: stock is part of the product
+        # responses, so bump their updated_at and drop the cached copies
+        product_ids = {line.variant.product_id for line in lines}
+        ProductModel.objects.filter(pk__in=product_ids).update(updated_at=now)
+        invalidate_product_cache(product_ids)
+    return order
@@ -0,0 +1,86 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for `list` and `retrieve`.
+
+    Validators come from one aggregate query (row count plus MAX of the
+    `conditional_timestamp_fields`) over the same queryset the action would
+    serialize, so a 304 is answered without building the response body.
+    """
+
+    conditional_timestamp_fields = ["updated_at"]
+
+    def get_conditional_validators(self, queryset):
+        stats = queryset.order_by().aggregate(
+            row_count=Count("pk"),
+            **{
+                f"max_{index}": Max(field)
+                for index, field in enumerate(self.conditional_timestamp_fields)
+            },
+        )
+        timestamps = [
+            value
+            for key, value in stats.items()
+            if key.startswith("max_") and value is not None
+        ]
+        last_modified = max(timestamps) if timestamps else None
+
+        raw = "|".join(
+            [
+                self.request.get_full_path(),
+                str(stats["row_count"]),
+                last_modified.isoformat() if last_modified else "",
+            ]
+        )
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        return etag, last_modified
+
+    def not_modified_response(self, validators):
+        etag, last_modified = validators
+        response = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            response = self.add_validator_headers(response, validators)
+        return response
+
+    def add_validator_headers(self, response, validators):
+        etag, last_modified = validators
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators(
+            self.filter_queryset(self.get_queryset())
+        )
+        not_modified = self.not_modified_response(validators)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return self.add_validator_headers(response, validators)
+
+    def get_lookup_filter(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **self.get_lookup_filter()
+        )
+        validators = self.get_conditional_validators(queryset)
+        not_modified = self.not_modified_response(validators)
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        return self.add_validator_headers(response, validators)
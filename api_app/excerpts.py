@@ -0,0 +1,21 @@
+import math
+
+from api_app.search import html_to_text
+
+EXCERPT_LENGTH = 280
+WORDS_PER_MINUTE = 200
+
+
+def make_excerpt(value, length=EXCERPT_LENGTH):
+    """Plain-text preview of TinyMCE HTML, cut on a word boundary."""
+    text = html_to_text(value)
+    if len(text) <= length:
+        return text
+    cut = text[: length - 1].rsplit(" ", 1)[0]
+    return cut.rstrip(",.;:-") + "…"
+
+
+def reading_stats(value):
+    """(word count, reading time in minutes) of an HTML body."""
+    words = len(html_to_text(value).split())
+    return words, math.ceil(words / WORDS_PER_MINUTE) if words else 0
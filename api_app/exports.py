@@ -0,0 +1,249 @@
+import csv
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from api_app.catalog_import import PRODUCT_UPDATE_FIELDS, VARIANT_FIELDS
+from api_app.models import OrderItemModel, OrderModel, ProductModel
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+DEFAULT_CHUNK_SIZE = 500
+
+# Same columns the importer reads, so an export can be re-imported as is
+PRODUCT_COLUMNS = (
+    ["slug"]
+    + [f for f in PRODUCT_UPDATE_FIELDS if f not in ("excerpt", "updated_at")]
+    + VARIANT_FIELDS
+    + ["variant_is_active"]
+)
+ORDER_COLUMNS = [
+    "order_id",
+    "created_at",
+    "status",
+    "delivery_type",
+    "total_amount",
+    "user_id",
+    "username",
+    "email",
+    "shipping_name",
+    "shipping_phone",
+    "shipping_address",
+    "shipping_city",
+    "shipping_state",
+    "shipping_postal_code",
+    "payment_method",
+    "payment_status",
+    "transaction_id",
+    "paid_at",
+]
+ORDER_ITEM_COLUMNS = [
+    "product_name",
+    "variant_details",
+    "price",
+    "quantity",
+    "line_total",
+]
+
+
+# -------------------------------
+# QUERYSETS
+# -------------------------------
+def product_export_queryset():
+    return (
+        ProductModel.objects.select_related("category", "brand")
+        .prefetch_related("variants")
+        .order_by("pk")
+    )
+
+
+def order_export_queryset():
+    return (
+        OrderModel.objects.select_related("user", "shipping_address", "payment")
+        .prefetch_related(
+            Prefetch("items", queryset=OrderItemModel.objects.order_by("pk"))
+        )
+        .order_by("pk")
+    )
+
+
+# -------------------------------
+# RECORDS
+# -------------------------------
+def product_records(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """One flat record per variant (or per product without variants)."""
+    for product in queryset.iterator(chunk_size=chunk_size):
+        base = {
+            "slug": product.slug,
+            "name": product.name,
+            "category": product.category.name,
+            "brand": product.brand.name if product.brand_id else "",
+            "price": product.price,
+            "discount_percent": product.discount_percent,
+            "warranty_years": product.warranty_years,
+            "description": product.description,
+            "is_active": product.is_active,
+            "is_featured": product.is_featured,
+        }
+        variants = product.variants.all()
+        if not variants:
+            yield base
+        for variant in variants:
+            yield {
+                **base,
+                **{field: getattr(variant, field) for field in VARIANT_FIELDS},
+                "variant_is_active": variant.is_active,
+            }
+
+
+def order_record(order):
+    """An order with its shipping address, payment and items nested."""
+    address = order.shipping_address
+    payment = getattr(order, "payment", None)
+    return {
+        "order_id": order.pk,
+        "created_at": order.created_at,
+        "status": order.status,
+        "delivery_type": order.delivery_type,
+        "total_amount": order.total_amount,
+        "user_id": order.user_id,
+        "username": order.user.username if order.user_id else "",
+        "email": order.user.email if order.user_id else "",
+        "shipping_name": address.name,
+        "shipping_phone": address.phone_number,
+        "shipping_address": address.address_line,
+        "shipping_city": address.city,
+        "shipping_state": address.state,
+        "shipping_postal_code": address.postal_code,
+        "payment_method": payment.payment_method if payment else "",
+        "payment_status": payment.payment_status if payment else "",
+        "transaction_id": (payment.transaction_id or "") if payment else "",
+        "paid_at": payment.paid_at if payment else None,
+        "items": [
+            {
+                "product_name": item.product_name,
+                "variant_details": item.variant_details,
+                "price": item.price,
+                "quantity": item.quantity,
+                "line_total": item.total_price,
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+def order_records(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    for order in queryset.iterator(chunk_size=chunk_size):
+        yield order_record(order)
+
+
+def flatten_orders(records):
+    """CSV shape: the order columns repeated on every item row."""
+    for record in records:
+        items = record.pop("items")
+        if not items:
+            yield record
+        for item in items:
+            yield {**record, **item}
+
+
+# -------------------------------
+# ENCODERS
+# -------------------------------
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, records):
+    writer = csv.DictWriter(_Echo(), fieldnames=columns, extrasaction="ignore")
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def iter_jsonl(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(kind, fmt, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lazily encoded lines of a products or orders export."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    if kind == "products":
+        records = product_records(
+            product_export_queryset() if queryset is None else queryset, chunk_size
+        )
+        if fmt == "csv":
+            return iter_csv(PRODUCT_COLUMNS, records)
+        return iter_jsonl(records)
+
+    if kind == "orders":
+        records = order_records(
+            order_export_queryset() if queryset is None else queryset, chunk_size
+        )
+        if fmt == "csv":
+            return iter_csv(ORDER_COLUMNS + ORDER_ITEM_COLUMNS, flatten_orders(records))
+        return iter_jsonl(records)
+
+    raise ValueError(f"Unknown export: {kind}")
+
+
+def streaming_export_response(kind, fmt, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    response = StreamingHttpResponse(
+        export_lines(kind, fmt, queryset, chunk_size),
+        content_type=EXPORT_FORMATS[fmt],
+    )
+    filename = f"{kind}-{date.today():%Y%m%d}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# -------------------------------
+# VIEWSET MIXIN
+# -------------------------------
+class StreamingExportMixin:
+    """
+    Adds GET `<prefix>/export/?output=csv|jsonl`, streamed row by row.
+
+    The viewset's filter backends apply, so the usual query parameters
+    narrow the export. (`output` rather than `format`, which DRF reserves
+    for renderer selection.)
+    """
+
+    export_kind = None
+
+    def get_export_queryset(self):
+        if self.export_kind == "products":
+            return product_export_queryset()
+        return order_export_queryset()
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        fmt = request.query_params.get("output", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {"detail": "output must be csv or jsonl."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            chunk_size = int(request.query_params.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        except ValueError:
+            chunk_size = DEFAULT_CHUNK_SIZE
+
+        queryset = self.filter_queryset(self.get_export_queryset())
+        return streaming_export_response(
+            self.export_kind, fmt, queryset, max(chunk_size, 1)
+        )
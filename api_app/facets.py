@@ -0,0 +1,138 @@
+from django.db.models import Count, Exists, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api_app.models import ProductVariantModel
+from api_app.reservations import with_available_stock
+
+# (label, min, max) — max is exclusive, None means open-ended
+PRICE_BUCKETS = [
+    ("0-5000", 0, 5000),
+    ("5000-10000", 5000, 10000),
+    ("10000-25000", 10000, 25000),
+    ("25000-50000", 25000, 50000),
+    ("50000+", 50000, None),
+]
+
+
+def _price_q(low, high):
+    q = Q(discounted_price__gte=low)
+    if high is not None:
+        q &= Q(discounted_price__lt=high)
+    return q
+
+
+def active_variants():
+    return ProductVariantModel.objects.filter(product=OuterRef("pk"), is_active=True)
+
+
+def available_variants():
+    """Active variants annotated with stock left after reservations."""
+    return with_available_stock(active_variants())
+
+
+def in_stock_variants():
+    return available_variants().filter(Q(is_made_to_order=True) | Q(available__gt=0))
+
+
+def _variant_aggregate(aggregate):
+    # Correlated subquery rather than a JOIN + GROUP BY, so it composes
+    # with the search/keyset-pagination querysets without duplicating rows
+    return Subquery(
+        available_variants()
+        .order_by()
+        .values("product")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def annotate_availability(products):
+    """
+    Stock and delivery badges computed in SQL over active variants:
+    total_stock (less unexpired reservations), made_to_order,
+    min_delivery_days (None without variants) and in_stock.
+    """
+    return products.annotate(
+        total_stock=Coalesce(_variant_aggregate(Sum("available")), 0),
+        made_to_order=Exists(active_variants().filter(is_made_to_order=True)),
+        min_delivery_days=_variant_aggregate(Min("delivery_days")),
+        in_stock=Exists(in_stock_variants()),
+    )
+
+
+def compute_facets(products):
+    """
+    Facet counts for an (already filtered) product queryset in five
+    aggregate queries: categories, brands, materials, colors, and one
+    conditional aggregate for totals, price buckets, stock and featured.
+    """
+    categories = (
+        products.values("category_id", "category__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category__name")
+    )
+    brands = (
+        products.filter(brand__isnull=False)
+        .values("brand_id", "brand__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "brand__name")
+    )
+
+    variants = ProductVariantModel.objects.filter(
+        product__in=products.values("pk"), is_active=True
+    )
+    materials = (
+        variants.exclude(material="")
+        .values("material")
+        .annotate(count=Count("product", distinct=True))
+        .order_by("-count", "material")
+    )
+    colors = (
+        variants.exclude(color="")
+        .values("color")
+        .annotate(count=Count("product", distinct=True))
+        .order_by("-count", "color")
+    )
+
+    bucket_counts = {
+        f"price_{index}": Count("id", filter=_price_q(low, high))
+        for index, (_, low, high) in enumerate(PRICE_BUCKETS)
+    }
+    totals = products.aggregate(
+        total=Count("id"),
+        in_stock=Count("id", filter=Q(Exists(in_stock_variants()))),
+        featured=Count("id", filter=Q(is_featured=True)),
+        **bucket_counts,
+    )
+
+    return {
+        "total": totals["total"],
+        "category": [
+            {
+                "id": row["category_id"],
+                "name": row["category__name"],
+                "count": row["count"],
+            }
+            for row in categories
+        ],
+        "brand": [
+            {"id": row["brand_id"], "name": row["brand__name"], "count": row["count"]}
+            for row in brands
+        ],
+        "material": [
+            {"value": row["material"], "count": row["count"]} for row in materials
+        ],
+        "color": [{"value": row["color"], "count": row["count"]} for row in colors],
+        "price": [
+            {"label": label, "min": low, "max": high, "count": totals[f"price_{index}"]}
+            for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        "in_stock": {
+            "true": totals["in_stock"],
+            "false": totals["total"] - totals["in_stock"],
+        },
+        "is_featured": {
+            "true": totals["featured"],
+            "false": totals["total"] - totals["featured"],
+        },
+    }
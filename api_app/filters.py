@@ -0,0 +1,45 @@
+import django_filters
+from django.db.models import Exists
+
+from api_app.facets import active_variants, in_stock_variants
+from api_app.models import OrderModel, ProductModel
+
+
+class ProductFilter(django_filters.FilterSet):
+    min_price = django_filters.NumberFilter(
+        field_name="discounted_price", lookup_expr="gte"
+    )
+    max_price = django_filters.NumberFilter(
+        field_name="discounted_price", lookup_expr="lte"
+    )
+    in_stock = django_filters.BooleanFilter(method="filter_in_stock")
+    # Ships within N days: at least one active variant delivers that fast
+    max_delivery_days = django_filters.NumberFilter(method="filter_max_delivery_days")
+
+    class Meta:
+        model = ProductModel
+        fields = ["category", "brand", "is_featured", "is_active"]
+
+    def filter_in_stock(self, queryset, name, value):
+        if value:
+            return queryset.filter(Exists(in_stock_variants()))
+        return queryset.filter(~Exists(in_stock_variants()))
+
+    def filter_max_delivery_days(self, queryset, name, value):
+        return queryset.filter(
+            Exists(active_variants().filter(delivery_days__lte=value))
+        )
+
+
+class OrderFilter(django_filters.FilterSet):
+    # Accepts a date ("2025-01-01") or a full ISO datetime
+    created_after = django_filters.DateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = django_filters.DateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = OrderModel
+        fields = ["status", "payment__payment_status", "delivery_type"]
@@ -1,5 +1,6 @@
 from django import forms
 from .models import *
+from .unique import save_unique, unique_value
 
 
 class UserRegisterForm(forms.ModelForm):
@@ -43,12 +44,6 @@ class UserRegisterForm(forms.ModelForm):
         base_username = (
             f"{self.cleaned_data['first_name']}{self.cleaned_data['last_name']}".lower()
         )
-        username = base_username
-        counter = 1
-        while UserModel.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-        user.username = username
 
         # Default role: Admin (not superadmin)
         user.is_staff = True
@@ -56,7 +51,11 @@ class UserRegisterForm(forms.ModelForm):
         user.is_user = False
 
         if commit:
-            user.save()
+            save_unique(user, "username", base_username, separator="")
+        else:
+            user.username = unique_value(
+                UserModel, "username", base_username, separator=""
+            )
         return user
 
 
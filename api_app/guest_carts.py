@@ -0,0 +1,174 @@
+import re
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from api_app.cart_totals import refresh_cart_totals
+from api_app.carts import (
+    CART_LINE_FIELDS,
+    final_quantities,
+    load_variants,
+    lock_cart,
+    upsert_lines,
+    validate_quantities,
+)
+from api_app.models import CartItemModel, CartModel, ProductVariantModel
+from api_app.reservations import with_available_stock
+
+CART_TOKEN_HEADER = "X-Cart-Token"
+TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+# Variant columns a guest line needs: the cart_lines() set seen from the
+# variant side, plus what validation reads
+GUEST_VARIANT_FIELDS = [
+    field.removeprefix("variant__")
+    for field in CART_LINE_FIELDS
+    if field.startswith("variant__")
+] + ["is_active", "product__discounted_price"]
+
+
+def _timeout():
+    return getattr(settings, "GUEST_CART_TIMEOUT", 60 * 60 * 24 * 30)
+
+
+def _key(token):
+    return f"guest-cart:{token}"
+
+
+def new_token():
+    return secrets.token_urlsafe(32)
+
+
+def request_token(request):
+    """The well-formed cart token sent with the request, if any."""
+    token = request.headers.get(CART_TOKEN_HEADER, "")
+    return token if TOKEN_RE.match(token) else None
+
+
+def get_guest_cart(token):
+    """The guest cart as {variant_id: quantity}."""
+    if not token:
+        return {}
+    return cache.get(_key(token)) or {}
+
+
+def save_guest_cart(token, quantities):
+    if quantities:
+        cache.set(_key(token), quantities, _timeout())
+    else:
+        cache.delete(_key(token))
+
+
+def clear_guest_cart(token):
+    cache.delete(_key(token))
+
+
+def _variants(variant_ids):
+    # Guests hold no reservations, so every unexpired one counts
+    return with_available_stock(
+        ProductVariantModel.objects.select_related("product").only(
+            *GUEST_VARIANT_FIELDS
+        )
+    ).in_bulk(variant_ids)
+
+
+def _lines(quantities, variants):
+    # Unsaved CartItemModel rows, so CartLineSerializer renders them like
+    # a user's cart; variants that went away or inactive are dropped
+    lines = []
+    for variant_id, quantity in quantities.items():
+        variant = variants.get(variant_id)
+        if variant is None or not variant.is_active:
+            continue
+        line = CartItemModel(
+            variant=variant,
+            quantity=quantity,
+            price=variant.product.discounted_price,
+        )
+        line.available = variant.available
+        lines.append(line)
+    return lines
+
+
+def guest_lines(quantities):
+    """The guest cart's lines at current prices, in one query."""
+    return _lines(quantities, _variants(quantities))
+
+
+def apply_guest_operations(token, operations):
+    """
+    Apply cart operations (see api_app.carts.apply_cart_operations) to a
+    guest cart. Stock and availability are checked the same way, but only
+    the cache is written. Returns the resulting lines.
+    """
+    quantities = get_guest_cart(token)
+    variants = _variants(
+        set(quantities) | {operation["variant_id"] for operation in operations}
+    )
+    final = final_quantities(operations, quantities)
+    validate_quantities(operations, final, variants)
+
+    quantities.update(final)
+    quantities = {key: value for key, value in quantities.items() if value}
+    save_guest_cart(token, quantities)
+    return _lines(quantities, variants)
+
+
+def merge_guest_cart(token, user):
+    """
+    Fold the guest cart behind `token` into `user`'s active cart.
+
+    Guest quantities are added to the user's existing lines, clamped to
+    available stock (lines that are already over it are left alone), written with
+    one bulk upsert, and the cart's totals refreshed. The cache entry is
+    removed first; only the request that actually removed it merges, so
+    concurrent requests with the same token can't merge twice. Returns
+    the cart, or None when there was nothing to merge.
+    """
+    quantities = get_guest_cart(token)
+    if not quantities or not cache.delete(_key(token)):
+        return None
+
+    with transaction.atomic():
+        cart, _ = CartModel.objects.get_or_create(user=user, is_active=True)
+        lock_cart(cart)
+        variants = load_variants(quantities, cart)
+        current = dict(
+            CartItemModel.objects.filter(
+                cart=cart, variant_id__in=quantities
+            ).values_list("variant_id", "quantity")
+        )
+
+        merged = {}
+        for variant_id, quantity in quantities.items():
+            variant = variants.get(variant_id)
+            if variant is None or not variant.is_active:
+                continue
+            existing = current.get(variant_id, 0)
+            total = existing + quantity
+            if not variant.is_made_to_order:
+                total = min(total, variant.available)
+            if total > existing:
+                merged[variant_id] = total
+        if merged:
+            upsert_lines(cart, merged, variants)
+            refresh_cart_totals(cart.pk)
+    return cart
+
+
+class GuestCartMergeMixin:
+    """
+    Merge the request's guest cart (X-Cart-Token header) into the user's
+    cart once the request is authenticated.
+
+    Login issues JWTs without a session, so the first authenticated cart
+    or checkout request carrying the token is where the merge happens.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        token = request_token(request)
+        if token and request.user.is_authenticated:
+            merge_guest_cart(token, request.user)
@@ -0,0 +1,226 @@
+import logging
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> longest edge in px
+DERIVATIVE_SIZES = getattr(
+    settings, "IMAGE_DERIVATIVE_SIZES", {"thumb": 320, "medium": 960}
+)
+DERIVATIVE_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+DERIVATIVE_QUALITY = 82
+
+# Seconds a "derivatives exist" / "not yet" answer is cached
+READY_CACHE_TIMEOUT = 60 * 60 * 24
+NOT_READY_CACHE_TIMEOUT = 60
+
+# (model label, image field) pairs that get derivatives
+IMAGE_FIELDS = [
+    ("api_app.ProductModel", "image"),
+    ("api_app.ProductImageModel", "image"),
+    ("api_app.CategoryModel", "image"),
+    ("api_app.BrandModel", "logo"),
+]
+
+
+def derivative_name(name, size, ext):
+    """products/Chair.jpg -> products/derivatives/Chair_jpg-thumb.webp"""
+    directory, filename = posixpath.split(name)
+    # Keep the original extension so Chair.jpg and Chair.png don't collide
+    stem = filename.replace(".", "_")
+    return posixpath.join(directory, "derivatives", f"{stem}-{size}.{ext}")
+
+
+def derivative_names(name):
+    return [
+        derivative_name(name, size, ext)
+        for size in DERIVATIVE_SIZES
+        for ext in DERIVATIVE_FORMATS
+    ]
+
+
+def _ready_key(name):
+    return f"image-derivatives:{name}"
+
+
+def derivatives_ready(name):
+    """
+    True when every derivative of `name` has been written. Both answers
+    are cached, a negative one briefly, so storage is checked at most once
+    a minute per missing or failed image; the entry is dropped when
+    derivatives are rescheduled, written or deleted.
+    """
+    ready = cache.get(_ready_key(name))
+    if ready is not None:
+        return ready
+    try:
+        ready = all(default_storage.exists(target) for target in derivative_names(name))
+    except (OSError, NotImplementedError):
+        ready = False
+    cache.set(
+        _ready_key(name),
+        ready,
+        READY_CACHE_TIMEOUT if ready else NOT_READY_CACHE_TIMEOUT,
+    )
+    return ready
+
+
+def srcset(field_file, request=None):
+    """
+    URL map for an image and its derivatives, or None when empty. Sizes
+    are only listed once their files exist; until then it's the original.
+    """
+    if not field_file:
+        return None
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request else url
+
+    data = {"original": absolute(field_file.url)}
+    if not derivatives_ready(field_file.name):
+        return data
+    for size in DERIVATIVE_SIZES:
+        data[size] = {
+            ext: absolute(
+                default_storage.url(derivative_name(field_file.name, size, ext))
+            )
+            for ext in DERIVATIVE_FORMATS
+        }
+    return data
+
+
+def thumbnail_url(field_file, request=None, size="thumb", ext="webp"):
+    """
+    URL of one derivative (the original until it has been generated), or
+    None when there is no image.
+    """
+    if not field_file:
+        return None
+    if derivatives_ready(field_file.name):
+        url = default_storage.url(derivative_name(field_file.name, size, ext))
+    else:
+        url = field_file.url
+    return request.build_absolute_uri(url) if request else url
+
+
+def delete_derivatives(name):
+    """Remove the derivatives of an image that was replaced."""
+    if not name:
+        return
+    cache.delete(_ready_key(name))
+    for target in derivative_names(name):
+        try:
+            if default_storage.exists(target):
+                default_storage.delete(target)
+        except (OSError, NotImplementedError) as e:
+            logger.warning("Could not delete derivative %s: %s", target, e)
+
+
+def _is_fresh(name):
+    """True when every derivative exists and is newer than the original."""
+    try:
+        original_mtime = default_storage.get_modified_time(name)
+        for size in DERIVATIVE_SIZES:
+            for ext in DERIVATIVE_FORMATS:
+                target = derivative_name(name, size, ext)
+                if default_storage.get_modified_time(target) < original_mtime:
+                    return False
+    except (FileNotFoundError, OSError, NotImplementedError):
+        return False
+    return True
+
+
+def _encode(image, fmt):
+    if fmt == "JPEG" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    elif fmt == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    buffer = BytesIO()
+    image.save(buffer, fmt, quality=DERIVATIVE_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, force=False):
+    """
+    Write every size/format derivative of the stored image `name`.
+    Returns the number of files written (0 when already up to date).
+    """
+    if not name or (not force and _is_fresh(name)):
+        return 0
+
+    with default_storage.open(name, "rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    written = 0
+    for size, edge in DERIVATIVE_SIZES.items():
+        resized = original.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for ext, fmt in DERIVATIVE_FORMATS.items():
+            target = derivative_name(name, size, ext)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(_encode(resized, fmt)))
+            written += 1
+    # Forget a cached "not yet" (effective where the cache is shared with
+    # the workers; otherwise it expires on its own)
+    cache.delete(_ready_key(name))
+    return written
+
+
+# -------------------------------
+# BACKGROUND PROCESS POOL
+# -------------------------------
+_executor = None
+
+
+def _init_worker(settings_module):
+    # Spawned workers (Windows/macOS) start without Django configured
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def make_executor(max_workers=None):
+    return ProcessPoolExecutor(
+        max_workers=max_workers or getattr(settings, "IMAGE_WORKERS", 2),
+        initializer=_init_worker,
+        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "api_main.settings"),),
+    )
+
+
+def _log_failure(name, future):
+    if future.exception() is not None:
+        logger.error("Image derivatives failed for %s: %s", name, future.exception())
+
+
+def schedule_derivatives(name):
+    """Generate derivatives for `name` off the request path."""
+    global _executor
+
+    if not name:
+        return
+    # Until the job is done (again), serve the original
+    cache.delete(_ready_key(name))
+    if not getattr(settings, "IMAGE_DERIVATIVES_ASYNC", True):
+        generate_derivatives(name)
+        return
+
+    if _executor is None:
+        _executor = make_executor()
+    future = _executor.submit(generate_derivatives, name)
+    future.add_done_callback(lambda done: _log_failure(name, done))
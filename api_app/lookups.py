@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+
+def _timeout():
+    return getattr(settings, "SLUG_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def slug_cache_key(prefix, slug):
+    return f"{prefix}:slug:{slug}"
+
+
+def remember_slug(prefix, slug, pk):
+    cache.set(slug_cache_key(prefix, slug), pk, _timeout())
+
+
+def forget_slug(prefix, slug):
+    cache.delete(slug_cache_key(prefix, slug))
+
+
+class SlugLookupMixin:
+    """
+    Detail routes accept either the slug or the numeric id.
+
+    A slug is turned into an id from a cached slug -> id map (filled on
+    first lookup, cleared on rename/delete by api_app.signals), so the
+    detail row is always fetched with one query, by primary key when the
+    map knows the slug and by slug otherwise. All-digit values are ids.
+    """
+
+    lookup_field = "slug"
+    slug_cache_prefix = None
+
+    def get_lookup_value(self):
+        return self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+
+    def resolve_pk(self):
+        """The id for the requested object when known without a query."""
+        value = self.get_lookup_value()
+        if value.isdigit():
+            return int(value)
+        return cache.get(slug_cache_key(self.slug_cache_prefix, value))
+
+    def get_lookup_filter(self):
+        pk = self.resolve_pk()
+        if pk is not None:
+            return {"pk": pk}
+        return {"slug": self.get_lookup_value()}
+
+    def get_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        value = self.get_lookup_value()
+
+        obj = queryset.filter(**self.get_lookup_filter()).first()
+        if obj is not None and not value.isdigit() and obj.slug != value:
+            # Stale map entry (renamed under us): drop it and go by slug
+            forget_slug(self.slug_cache_prefix, value)
+            obj = queryset.filter(slug=value).first()
+        if obj is None:
+            raise Http404
+        if not value.isdigit():
+            remember_slug(self.slug_cache_prefix, value, obj.pk)
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def get_detail_cache_id(self):
+        # Cached responses (api_app.response_cache) are versioned by id, so
+        # invalidating a product also reaches its slug URLs
+        return self.resolve_pk()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api_app.related import refresh_related
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related-products index for every active product "
+        "(edits keep it current incrementally; run this after bulk changes)."
+    )
+
+    def handle(self, *args, **options):
+        written = refresh_related()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} related links."))
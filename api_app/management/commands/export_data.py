@@ -0,0 +1,67 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app.exports import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    export_lines,
+    order_export_queryset,
+)
+from api_app.filters import OrderFilter
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the catalog (products/variants) or orders (with items and "
+        "payment) as CSV or JSONL without loading the table into memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=["products", "orders"])
+        parser.add_argument(
+            "--format", choices=list(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument(
+            "--output", "-o", help="File to write (defaults to stdout)."
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--since", help="Orders only: created on or after this date/datetime."
+        )
+        parser.add_argument(
+            "--until", help="Orders only: created before this date/datetime."
+        )
+
+    def handle(self, *args, **options):
+        queryset = None
+        if options["kind"] == "orders":
+            filterset = OrderFilter(
+                {
+                    "created_after": options["since"],
+                    "created_before": options["until"],
+                },
+                queryset=order_export_queryset(),
+            )
+            if not filterset.is_valid():
+                raise CommandError(filterset.errors.as_text())
+            queryset = filterset.qs
+        elif options["since"] or options["until"]:
+            raise CommandError("--since/--until only apply to orders")
+
+        lines = export_lines(
+            options["kind"], options["format"], queryset, options["chunk_size"]
+        )
+        if not options["output"]:
+            for line in lines:
+                sys.stdout.write(line)
+            return
+
+        written = 0
+        with open(options["output"], "w", encoding="utf-8", newline="") as out:
+            for line in lines:
+                out.write(line)
+                written += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {written} lines to {options['output']}.")
+        )
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from api_app import images
+
+
+class Command(BaseCommand):
+    help = "Generate thumb/medium WebP and JPEG derivatives for existing media."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Worker processes to use."
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate even when derivatives are up to date.",
+        )
+
+    def handle(self, *args, **options):
+        names = set()
+        for label, field in images.IMAGE_FIELDS:
+            model = apps.get_model(label)
+            names.update(
+                model.objects.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+            )
+
+        self.stdout.write(f"Processing {len(names)} images...")
+        started = time.monotonic()
+        written = failed = 0
+
+        with images.make_executor(options["workers"]) as executor:
+            futures = {
+                executor.submit(
+                    images.generate_derivatives, name, options["force"]
+                ): name
+                for name in sorted(names)
+            }
+            for future in as_completed(futures):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {e}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} derivative files for {len(names)} images "
+                f"in {elapsed:.1f}s ({failed} failed)."
+            )
+        )
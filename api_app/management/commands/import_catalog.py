@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app.catalog_import import CatalogImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV or JSONL file of products/variants (one variant per row) "
+        "and upsert it in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file to import.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format (defaults to the file extension).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create categories/brands that don't exist yet.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in ("csv", "jsonl"):
+            raise CommandError("Use --format csv or --format jsonl")
+
+        importer = CatalogImporter(
+            batch_size=options["batch_size"],
+            create_missing=options["create_missing"],
+        )
+        with path.open("r", encoding="utf-8-sig", newline="") as stream:
+            report = importer.run(iter_rows(stream, fmt))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['rows']} rows -> {report['products']} products, "
+                f"{report['variants']} variants in {report['seconds']}s "
+                f"({report['rows_per_second']} rows/s, {len(report['errors'])} errors)."
+            )
+        )
@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.carts import purge_carts, stale_carts
+from api_app.models import CartItemModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete deactivated carts and abandoned active carts older than the "
+        "given ages, in short batched transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--inactive-days",
+            type=int,
+            default=getattr(settings, "CART_INACTIVE_RETENTION_DAYS", 30),
+            help="Age of checked-out / deactivated carts to delete.",
+        )
+        parser.add_argument(
+            "--idle-days",
+            type=int,
+            default=getattr(settings, "CART_IDLE_DAYS", 90),
+            help="Days without activity after which an active cart is abandoned.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches to let other writers in.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        carts = stale_carts(
+            inactive_before=now - timedelta(days=options["inactive_days"]),
+            idle_before=now - timedelta(days=options["idle_days"]),
+        )
+
+        if options["dry_run"]:
+            lines = CartItemModel.objects.filter(cart__in=carts.values("pk")).count()
+            self.stdout.write(
+                f"Would delete {carts.count()} carts with {lines} lines."
+            )
+            return
+
+        started = time.monotonic()
+        cart_total = line_total = 0
+        for batch, (cart_count, line_count) in enumerate(
+            purge_carts(carts, options["batch_size"]), start=1
+        ):
+            cart_total += cart_count
+            line_total += line_count
+            self.stdout.write(
+                f"Batch {batch}: {cart_count} carts, {line_count} lines "
+                f"({cart_total} carts so far)"
+            )
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {cart_total} carts with {line_total} lines "
+                f"in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api_app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 product search index from scratch."
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(
+                self.style.WARNING("Full-text index is only used on SQLite; skipped.")
+            )
+            return
+
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_app import ratings
+from api_app.models import ProductModel, ProductReviewModel
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating aggregates on every product."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = ratings.recompute_ratings(
+                ProductModel, ProductReviewModel, batch_size=options["batch_size"]
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed ratings for {count} products.")
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api_app.reservations import sweep_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired checkout stock reservations in short batches "
+        "(run from cron every few minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = sum(sweep_expired(options["batch_size"]))
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired reservations.")
+        )
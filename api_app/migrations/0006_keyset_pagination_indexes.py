@@ -0,0 +1,38 @@
+# Generated by Django 6.0.3 on 2026-10-17 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0005_alter_paymentmodel_payment_method'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_blo_created_0f8d97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_ord_created_78fb22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productimagemodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_pro_created_05d67e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_pro_created_1b2341_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariantmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_pro_created_2a1fc6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermodel',
+            index=models.Index(fields=['-created_at', '-id'], name='api_app_use_created_795c6d_idx'),
+        ),
+    ]
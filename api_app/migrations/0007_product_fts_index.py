@@ -0,0 +1,86 @@
+# Generated by Django 6.0.3 on 2026-10-17 18:59
+
+import html
+import re
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# Frozen copies of api_app.search as of this migration, so later changes
+# to the live module can't alter what a fresh database gets.
+FTS_TABLE = "api_app_product_fts"
+
+CREATE_FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name,
+    description,
+    brand,
+    category,
+    variants,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+DROP_FTS_TABLE_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+BLOCK_TAG_RE = re.compile(
+    r"<(?=/?(?:p|div|br|hr|h[1-6]|li|ul|ol|tr|td|th|blockquote|pre)\b)",
+    re.IGNORECASE,
+)
+
+
+def html_to_text(value):
+    value = BLOCK_TAG_RE.sub(" <", value or "")
+    return " ".join(html.unescape(strip_tags(value)).split())
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_FTS_TABLE_SQL)
+
+    ProductModel = apps.get_model("api_app", "ProductModel")
+    products = ProductModel.objects.select_related("brand", "category").prefetch_related(
+        "variants"
+    )
+    rows = [
+        (
+            product.pk,
+            product.name,
+            html_to_text(product.description),
+            product.brand.name if product.brand else "",
+            product.category.name,
+            " ".join(
+                f"{variant.material} {variant.color}"
+                for variant in product.variants.all()
+                if variant.is_active
+            ),
+        )
+        for product in products
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} "
+                "(rowid, name, description, brand, category, variants) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(DROP_FTS_TABLE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:00
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_ratings(apps, schema_editor):
+    ProductModel = apps.get_model("api_app", "ProductModel")
+    ProductReviewModel = apps.get_model("api_app", "ProductReviewModel")
+
+    histograms = defaultdict(dict)
+    rows = ProductReviewModel.objects.values("product_id", "rating").annotate(
+        n=Count("id")
+    )
+    for row in rows:
+        histograms[row["product_id"]][row["rating"]] = row["n"]
+
+    products = []
+    for product in ProductModel.objects.only("pk").iterator(chunk_size=500):
+        histogram = histograms.get(product.pk, {})
+        count = sum(histogram.values())
+        for star in range(1, 6):
+            setattr(product, f"rating_{star}", histogram.get(star, 0))
+        product.rating_count = count
+        product.rating_avg = (
+            round(sum(star * n for star, n in histogram.items()) / count, 2)
+            if count
+            else 0
+        )
+        products.append(product)
+
+    fields = ["rating_avg", "rating_count"] + [f"rating_{star}" for star in range(1, 6)]
+    ProductModel.objects.bulk_update(products, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0007_product_fts_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='productmodel',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='productmodel',
+            index=models.Index(fields=['-rating_avg', '-rating_count'], name='api_app_pro_rating__f0641c_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:01
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_app", "0008_product_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productmodel",
+            name="discounted_price",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.math.Round(
+                    django.db.models.expressions.CombinedExpression(
+                        django.db.models.expressions.CombinedExpression(
+                            models.F("price"),
+                            "*",
+                            django.db.models.expressions.CombinedExpression(
+                                models.Value(100), "-", models.F("discount_percent")
+                            ),
+                        ),
+                        "*",
+                        models.Value(Decimal("0.01")),
+                    ),
+                    2,
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=10),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productmodel",
+            index=models.Index(
+                fields=["discounted_price"], name="api_app_pro_discoun_8a17c1_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_app", "0010_related_products"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productvariantmodel",
+            index=models.Index(
+                fields=["product", "is_active", "stock"],
+                name="api_app_pro_product_4d5c31_idx",
+            ),
+        ),
+    ]
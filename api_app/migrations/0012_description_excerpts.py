@@ -0,0 +1,99 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:12
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Frozen copies of api_app.excerpts / api_app.search.html_to_text as of
+# this migration
+EXCERPT_LENGTH = 280
+WORDS_PER_MINUTE = 200
+
+BLOCK_TAG_RE = re.compile(
+    r"<(?=/?(?:p|div|br|hr|h[1-6]|li|ul|ol|tr|td|th|blockquote|pre)\b)",
+    re.IGNORECASE,
+)
+
+
+def html_to_text(value):
+    value = BLOCK_TAG_RE.sub(" <", value or "")
+    return " ".join(html.unescape(strip_tags(value)).split())
+
+
+def make_excerpt(value, length=EXCERPT_LENGTH):
+    text = html_to_text(value)
+    if len(text) <= length:
+        return text
+    cut = text[: length - 1].rsplit(" ", 1)[0]
+    return cut.rstrip(",.;:-") + "…"
+
+
+def reading_stats(value):
+    words = len(html_to_text(value).split())
+    return words, math.ceil(words / WORDS_PER_MINUTE) if words else 0
+
+
+def backfill_excerpts(apps, schema_editor):
+    for model_name, source in [
+        ("ProductModel", "description"),
+        ("CategoryModel", "description"),
+        ("BrandModel", "description"),
+        ("BlogModel", "content"),
+    ]:
+        model = apps.get_model("api_app", model_name)
+        fields = ["excerpt"]
+        if model_name == "BlogModel":
+            fields += ["word_count", "reading_time"]
+
+        rows = []
+        for obj in model.objects.only("pk", source).iterator(chunk_size=500):
+            html = getattr(obj, source)
+            obj.excerpt = make_excerpt(html)
+            if model_name == "BlogModel":
+                obj.word_count, obj.reading_time = reading_stats(html)
+            rows.append(obj)
+        model.objects.bulk_update(rows, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_app", "0011_variant_stock_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogmodel",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="blogmodel",
+            name="reading_time",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="blogmodel",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="brandmodel",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="categorymodel",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="productmodel",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_cart_totals(apps, schema_editor):
+    CartModel = apps.get_model("api_app", "CartModel")
+    CartItemModel = apps.get_model("api_app", "CartItemModel")
+
+    lines = CartItemModel.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    CartModel.objects.update(
+        item_count=Coalesce(
+            Subquery(lines.annotate(total=Sum("quantity")).values("total")),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        subtotal=Coalesce(
+            Subquery(
+                lines.annotate(total=Sum(F("price") * F("quantity"))).values("total")
+            ),
+            Decimal("0"),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_app", "0012_description_excerpts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cartmodel",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartmodel",
+            name="subtotal",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
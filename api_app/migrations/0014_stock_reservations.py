@@ -0,0 +1,59 @@
+# Generated by Django 6.0.3 on 2026-10-17 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_app", "0013_cart_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockReservationModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "cart",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="api_app.cartmodel",
+                    ),
+                ),
+                (
+                    "variant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="api_app.productvariantmodel",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["variant", "expires_at"],
+                        name="api_app_sto_variant_ef3736_idx",
+                    ),
+                    models.Index(
+                        fields=["expires_at"], name="api_app_sto_expires_364dd3_idx"
+                    ),
+                ],
+                "unique_together": {("cart", "variant")},
+            },
+        ),
+    ]
@@ -1,6 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Round
 from tinymce.models import HTMLField
 from django.utils.text import slugify
+from functools import partial
+from api_app.unique import save_unique
+from api_app.excerpts import make_excerpt, reading_stats
+from api_app.cart_totals import refresh_cart_totals
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 from django.contrib.auth.hashers import make_password
@@ -71,19 +77,21 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email", "first_name", "last_name", "phone_number"]
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.username:
-            base_username = slugify(f"{self.first_name} {self.last_name}")
-            if not base_username and self.email:
-                base_username = self.email.split("@")[0]
-            unique_username = base_username
-            counter = 1
-            while UserModel.objects.filter(username=unique_username).exists():
-                unique_username = f"{base_username}-{counter}"
-                counter += 1
-
-            self.username = unique_username
-        super().save(*args, **kwargs)
+        if self.username:
+            return super().save(*args, **kwargs)
+
+        base_username = slugify(f"{self.first_name} {self.last_name}")
+        if not base_username and self.email:
+            base_username = self.email.split("@")[0]
+        save_unique(
+            self, "username", base_username, save=partial(super().save, *args, **kwargs)
+        )
 
     def __str__(self):
         return self.username
@@ -99,15 +107,20 @@ class CategoryModel(models.Model):
         null=True,
     )
     description = HTMLField(blank=True)
+    # Plain-text preview of description, set on save
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        self.excerpt = make_excerpt(self.description)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        save_unique(
+            self, "slug", slugify(self.name), save=partial(super().save, *args, **kwargs)
+        )
 
     def __str__(self):
         return self.name
@@ -119,15 +132,20 @@ class BrandModel(models.Model):
     slug = models.SlugField(unique=True, blank=True)
     logo = models.ImageField(upload_to="brands/", blank=True, null=True)
     description = HTMLField(blank=True)
+    # Plain-text preview of description, set on save
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        self.excerpt = make_excerpt(self.description)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        save_unique(
+            self, "slug", slugify(self.name), save=partial(super().save, *args, **kwargs)
+        )
 
     def __str__(self):
         return self.name
@@ -147,6 +165,16 @@ class ProductModel(models.Model):
 
     price = models.DecimalField(max_digits=10, decimal_places=2)
     discount_percent = models.PositiveIntegerField(default=0)
+    # Price the customer pays; computed by the database so bulk
+    # queryset.update() calls on price/discount keep it in sync
+    discounted_price = models.GeneratedField(
+        expression=Round(
+            F("price") * (100 - F("discount_percent")) * Value(Decimal("0.01")),
+            2,
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
 
     image = models.ImageField(
         upload_to="products/",
@@ -158,10 +186,21 @@ class ProductModel(models.Model):
 
     warranty_years = models.PositiveIntegerField(default=0)
     description = HTMLField(blank=True)
+    # Plain-text preview of description, set on save
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
 
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
 
+    # Review aggregates, maintained by api_app.ratings
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -169,17 +208,22 @@ class ProductModel(models.Model):
         indexes = [
             models.Index(fields=["slug"]),
             models.Index(fields=["price"]),
+            models.Index(fields=["discounted_price"]),
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["-rating_avg", "-rating_count"]),
         ]
 
     @property
-    def discounted_price(self):
-        discount = (Decimal(self.discount_percent) / 100) * self.price
-        return self.price - discount
+    def rating_histogram(self):
+        return {star: getattr(self, f"rating_{star}") for star in range(1, 6)}
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        self.excerpt = make_excerpt(self.description)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        save_unique(
+            self, "slug", slugify(self.name), save=partial(super().save, *args, **kwargs)
+        )
 
     def __str__(self):
         return self.name
@@ -195,6 +239,11 @@ class ProductImageModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+
 
 # Product Variant Model
 class ProductVariantModel(models.Model):
@@ -224,11 +273,38 @@ class ProductVariantModel(models.Model):
 
     class Meta:
         unique_together = ("product", "material", "color")
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["product", "is_active", "stock"]),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.material} - {self.color}"
 
 
+# Related Product Model
+# Precomputed "similar items", maintained by api_app.related
+class RelatedProductModel(models.Model):
+    product = models.ForeignKey(
+        ProductModel, related_name="related_links", on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(
+        ProductModel, related_name="related_from", on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("product", "related")
+        indexes = [
+            models.Index(fields=["product", "-score"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.2f})"
+
+
 # Product Review Model
 class ProductReviewModel(models.Model):
     product = models.ForeignKey(
@@ -245,12 +321,21 @@ class ProductReviewModel(models.Model):
     class Meta:
         unique_together = ("product", "user")
 
+    def save(self, *args, **kwargs):
+        # Keep the product's rating aggregates in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 # Cart Model
 class CartModel(models.Model):
     user = models.ForeignKey(UserModel, on_delete=models.CASCADE, null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
+    # Line aggregates, maintained by api_app.cart_totals
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -278,33 +363,68 @@ class CartItemModel(models.Model):
     def save(self, *args, **kwargs):
         if self.variant and self.variant.product:
             self.price = self.variant.product.discounted_price
-        super().save(*args, **kwargs)
+        # Keep the cart's item_count / subtotal in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            refresh_cart_totals(self.cart_id)
 
     def __str__(self):
         return f"{self.variant.product.name} x {self.quantity}"
 
 
+# Stock Reservation Model
+# Stock held for a cart during checkout, maintained by api_app.reservations
+class StockReservationModel(models.Model):
+    cart = models.ForeignKey(
+        CartModel, related_name="reservations", on_delete=models.CASCADE
+    )
+    variant = models.ForeignKey(
+        ProductVariantModel, related_name="reservations", on_delete=models.CASCADE
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("cart", "variant")
+        indexes = [
+            models.Index(fields=["variant", "expires_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.variant} x {self.quantity} until {self.expires_at}"
+
+
 # Blog Model
 class BlogModel(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)
     image = models.ImageField(upload_to="blogs/", blank=True, null=True)
     content = HTMLField(blank=True)
+    # Plain-text preview and reading stats of content, set on save
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while BlogModel.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        self.excerpt = make_excerpt(self.content)
+        self.word_count, self.reading_time = reading_stats(self.content)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        save_unique(
+            self, "slug", slugify(self.title), save=partial(super().save, *args, **kwargs)
+        )
 
     def __str__(self):
         return self.title
@@ -387,6 +507,11 @@ class OrderModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+
     def __str__(self):
         return f"Order #{self.id}"
 
@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (created_at, id).
+
+    When the view has an OrderingFilter, the requested ordering is used and
+    `id` is appended as a tie-breaker so the page boundaries stay stable.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = getattr(settings, "API_PAGE_SIZE", 24)
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[-1].lstrip("-") in ("id", "pk"):
+            return ordering
+        tie_breaker = "-id" if ordering[0].startswith("-") else "id"
+        return ordering + (tie_breaker,)
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from api_app import response_cache
+from api_app.cart_totals import refresh_cart_totals
+from api_app.models import CartItemModel, ProductModel
+from api_app.signals import PRODUCT_CACHE_PREFIX
+
+# Ids per UPDATE, to stay under the database's bound-parameter limit
+ID_BATCH_SIZE = 500
+
+
+def price_changes(discount_percent=None, price=None, price_change_percent=None):
+    """UPDATE kwargs for the requested change; price wins over a percentage."""
+    changes = {}
+    if discount_percent is not None:
+        changes["discount_percent"] = discount_percent
+    if price is not None:
+        changes["price"] = price
+    elif price_change_percent is not None:
+        factor = (Decimal(100) + Decimal(price_change_percent)) / Decimal(100)
+        changes["price"] = Round(F("price") * Value(factor), 2)
+    return changes
+
+
+def bulk_reprice(products, **change):
+    """
+    Apply a price/discount change to every product in `products`, then
+    move the open cart lines of those products to the new discounted
+    price and refresh those carts' totals: three UPDATEs per batch of
+    ID_BATCH_SIZE products.
+
+    discounted_price is a generated column, so the database recomputes it
+    as part of the same UPDATE. The matching ids are read up front and
+    every follow-up statement works from them, since the change itself
+    may move rows out of a price-range filter.
+    """
+    changes = price_changes(**change)
+    if not changes:
+        return {"products": 0, "cart_items": 0, "carts": 0}
+
+    stamp = timezone.now()
+    product_count = line_count = 0
+    cart_ids = set()
+    with transaction.atomic():
+        # Ids first: the change may move rows out of a price-range filter
+        ids = list(products.values_list("pk", flat=True))
+        for start in range(0, len(ids), ID_BATCH_SIZE):
+            batch = ids[start : start + ID_BATCH_SIZE]
+            product_count += ProductModel.objects.filter(pk__in=batch).update(
+                **changes, updated_at=stamp
+            )
+
+            lines = CartItemModel.objects.filter(
+                cart__is_active=True, variant__product_id__in=batch
+            )
+            cart_ids.update(lines.values_list("cart_id", flat=True).distinct())
+            line_count += lines.update(
+                price=Subquery(
+                    ProductModel.objects.filter(
+                        variants=OuterRef("variant_id")
+                    ).values("discounted_price")[:1]
+                ),
+                updated_at=stamp,
+            )
+            refresh_cart_totals(lines.values("cart_id"))
+
+        # Queryset updates skip signals: drop the cached product responses.
+        # (Related-product scores pick the new prices up on the next
+        # compute_related_products run.)
+        response_cache.invalidate_detail(PRODUCT_CACHE_PREFIX, ids)
+        response_cache.invalidate_list(PRODUCT_CACHE_PREFIX)
+
+    return {"products": product_count, "cart_items": line_count, "carts": len(cart_ids)}
@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+RATING_FIELDS = ["rating_avg", "rating_count"] + [
+    f"rating_{star}" for star in range(1, 6)
+]
+
+
+def rating_avg_expression():
+    weighted = sum(F(f"rating_{star}") * star for star in range(1, 6))
+    return Coalesce(
+        Round(Cast(weighted, FloatField()) / NullIf(F("rating_count"), 0), 2),
+        0.0,
+        output_field=FloatField(),
+    )
+
+
+def apply_rating_change(product_id, added=None, removed=None):
+    """
+    Incrementally move a product's aggregates: `added` / `removed` are the
+    star values of the review that appeared / disappeared.
+    """
+    from api_app.models import ProductModel
+
+    delta = defaultdict(int)
+    if added:
+        delta[added] += 1
+    if removed:
+        delta[removed] -= 1
+    delta = {star: n for star, n in delta.items() if n}
+    if not delta:
+        return
+
+    products = ProductModel.objects.filter(pk=product_id)
+    products.update(
+        rating_count=F("rating_count") + sum(delta.values()),
+        **{f"rating_{star}": F(f"rating_{star}") + n for star, n in delta.items()},
+    )
+    products.update(rating_avg=rating_avg_expression())
+
+
+def recompute_ratings(product_model, review_model, batch_size=500):
+    """
+    Rebuild every product's aggregates from the review table.
+    """
+    histograms = defaultdict(dict)
+    rows = review_model.objects.values("product_id", "rating").annotate(
+        n=Count("id")
+    )
+    for row in rows:
+        histograms[row["product_id"]][row["rating"]] = row["n"]
+
+    products = []
+    for product in product_model.objects.only("pk").iterator(chunk_size=batch_size):
+        histogram = histograms.get(product.pk, {})
+        count = sum(histogram.values())
+        for star in range(1, 6):
+            setattr(product, f"rating_{star}", histogram.get(star, 0))
+        product.rating_count = count
+        product.rating_avg = (
+            round(sum(star * n for star, n in histogram.items()) / count, 2)
+            if count
+            else 0
+        )
+        products.append(product)
+
+    product_model.objects.bulk_update(products, RATING_FIELDS, batch_size=batch_size)
+    return len(products)
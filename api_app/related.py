@@ -0,0 +1,170 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from api_app.models import ProductModel, ProductVariantModel, RelatedProductModel
+
+RELATED_LIMIT = getattr(settings, "RELATED_PRODUCTS_LIMIT", 12)
+
+# Products scored per group (category / brand) on each side of the target's
+# price; keeps large categories from turning into an all-pairs comparison.
+CANDIDATE_WINDOW = 50
+
+WEIGHTS = {
+    "category": 3.0,
+    "brand": 2.0,
+    "material": 1.5,
+    "color": 1.0,
+    "price": 2.0,
+}
+
+
+def _signatures(products):
+    signatures = {
+        pk: {
+            "category": category_id,
+            "brand": brand_id,
+            "price": float(price or 0),
+            "materials": set(),
+            "colors": set(),
+        }
+        for pk, category_id, brand_id, price in products.values_list(
+            "pk", "category_id", "brand_id", "discounted_price"
+        )
+    }
+    variants = ProductVariantModel.objects.filter(
+        product_id__in=products.values("pk"), is_active=True
+    ).values_list("product_id", "material", "color")
+    for product_id, material, color in variants:
+        if material:
+            signatures[product_id]["materials"].add(material.lower())
+        if color:
+            signatures[product_id]["colors"].add(color.lower())
+    return signatures
+
+
+def _groups(signatures):
+    """(kind, id) -> (prices, product ids), both sorted by price."""
+    members = defaultdict(list)
+    for pk, sig in signatures.items():
+        members[("category", sig["category"])].append((sig["price"], pk))
+        if sig["brand"]:
+            members[("brand", sig["brand"])].append((sig["price"], pk))
+
+    groups = {}
+    for key, rows in members.items():
+        rows.sort()
+        groups[key] = ([price for price, _ in rows], [pk for _, pk in rows])
+    return groups
+
+
+def _overlap(a, b):
+    union = a | b
+    return len(a & b) / len(union) if union else 0.0
+
+
+def score(a, b):
+    total = 0.0
+    if a["category"] == b["category"]:
+        total += WEIGHTS["category"]
+    if a["brand"] and a["brand"] == b["brand"]:
+        total += WEIGHTS["brand"]
+    total += WEIGHTS["material"] * _overlap(a["materials"], b["materials"])
+    total += WEIGHTS["color"] * _overlap(a["colors"], b["colors"])
+    highest = max(a["price"], b["price"])
+    if highest > 0:
+        total += WEIGHTS["price"] * (1 - abs(a["price"] - b["price"]) / highest)
+    return round(total, 4)
+
+
+def _candidates(pk, sig, groups):
+    keys = [("category", sig["category"])]
+    if sig["brand"]:
+        keys.append(("brand", sig["brand"]))
+
+    found = set()
+    for key in keys:
+        prices, ids = groups[key]
+        middle = bisect_left(prices, sig["price"])
+        start = max(middle - CANDIDATE_WINDOW, 0)
+        found.update(ids[start : middle + CANDIDATE_WINDOW])
+    found.discard(pk)
+    return found
+
+
+def refresh_related(product_ids=None, limit=RELATED_LIMIT):
+    """
+    Recompute the related list of `product_ids` (every product when None)
+    and return the number of rows written.
+
+    Only active products in the same category or brand are candidates, so
+    a partial refresh only loads those groups.
+    """
+    active = ProductModel.objects.filter(is_active=True)
+    if product_ids is None:
+        pool = active
+    else:
+        product_ids = set(product_ids)
+        scope = ProductModel.objects.filter(pk__in=product_ids)
+        pool = active.filter(
+            Q(category_id__in=scope.values("category_id"))
+            | Q(brand_id__in=scope.values("brand_id"))
+        )
+
+    signatures = _signatures(pool)
+    groups = _groups(signatures)
+    targets = signatures.keys() if product_ids is None else product_ids
+
+    links = []
+    for pk in targets:
+        sig = signatures.get(pk)
+        if sig is None:
+            # Inactive or deleted: it just loses its list
+            continue
+        best = heapq.nlargest(
+            limit,
+            ((score(sig, signatures[other]), other) for other in _candidates(pk, sig, groups)),
+        )
+        links.extend(
+            RelatedProductModel(product_id=pk, related_id=other, score=value)
+            for value, other in best
+        )
+
+    with transaction.atomic():
+        stale = RelatedProductModel.objects.all()
+        if product_ids is not None:
+            stale = stale.filter(product_id__in=product_ids)
+        stale.delete()
+        RelatedProductModel.objects.bulk_create(links, batch_size=1000)
+    return len(links)
+
+
+def refresh_for_products(product_ids):
+    """
+    Incremental refresh after `product_ids` changed: their own lists, the
+    lists that point at them, and the lists of their new neighbours (which
+    may now rank them differently).
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+
+    affected = product_ids | set(
+        RelatedProductModel.objects.filter(related_id__in=product_ids).values_list(
+            "product_id", flat=True
+        )
+    )
+    written = refresh_related(affected)
+
+    neighbours = set(
+        RelatedProductModel.objects.filter(product_id__in=product_ids).values_list(
+            "related_id", flat=True
+        )
+    )
+    if neighbours - affected:
+        written += refresh_related(neighbours - affected)
+    return written
@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from api_app.models import (
+    CartItemModel,
+    ProductModel,
+    ProductVariantModel,
+    StockReservationModel,
+)
+from api_app.signals import invalidate_product_cache
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, "CHECKOUT_RESERVATION_MINUTES", 15))
+
+
+def touch_products(product_ids, now=None):
+    """
+    Product responses show stock net of reservations: bump the products'
+    updated_at (their ETag / Last-Modified) and drop the cached copies.
+    """
+    if not product_ids:
+        return
+    ProductModel.objects.filter(pk__in=product_ids).update(
+        updated_at=now or timezone.now()
+    )
+    invalidate_product_cache(product_ids)
+
+
+def reserved_quantity(now, exclude_cart=None, variant_ref="pk"):
+    """
+    Quantity of the outer query's variant (`variant_ref`) held by
+    unexpired reservations other than `exclude_cart`'s, as a subquery
+    over the (variant, expires_at) index.
+    """
+    held = StockReservationModel.objects.filter(
+        variant=OuterRef(variant_ref), expires_at__gt=now
+    )
+    if exclude_cart is not None:
+        held = held.exclude(cart=exclude_cart)
+    return Coalesce(
+        Subquery(
+            held.order_by()
+            .values("variant")
+            .annotate(total=Sum("quantity"))
+            .values("total")
+        ),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def with_available_stock(variants, now=None, exclude_cart=None):
+    """Annotate `available` = stock - unexpired reservations of others."""
+    now = now or timezone.now()
+    return variants.annotate(
+        available=F("stock") - reserved_quantity(now, exclude_cart)
+    )
+
+
+def reserve_cart(cart):
+    """
+    Hold stock for every stocked line of `cart` until now + the checkout
+    TTL, replacing the cart's previous reservations.
+
+    The cart's variants are locked and their available stock read in one
+    query, then the old reservations are replaced and the products
+    touched (touch_products), so the row locks are held briefly. Raises
+    ValidationError (keyed by variant id) without reserving anything when
+    a line is short. Returns the new reservations.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        quantities = dict(
+            CartItemModel.objects.filter(cart=cart).values_list("variant_id", "quantity")
+        )
+        if not quantities:
+            raise serializers.ValidationError("Cart is empty.")
+
+        variants = with_available_stock(
+            ProductVariantModel.objects.filter(pk__in=quantities, is_made_to_order=False)
+            .select_for_update()
+            .only("pk", "product_id", "stock"),
+            now,
+            exclude_cart=cart,
+        )
+        short = {
+            variant.pk: f"Only {max(variant.available, 0)} available."
+            for variant in variants
+            if quantities[variant.pk] > variant.available
+        }
+        if short:
+            raise serializers.ValidationError({"reservations": short})
+
+        expires_at = now + reservation_ttl()
+        release_cart(cart)
+        touch_products({variant.product_id for variant in variants}, now)
+        return StockReservationModel.objects.bulk_create(
+            [
+                StockReservationModel(
+                    cart=cart,
+                    variant_id=variant.pk,
+                    quantity=quantities[variant.pk],
+                    expires_at=expires_at,
+                )
+                for variant in variants
+            ]
+        )
+
+
+def release_cart(cart):
+    """Drop the cart's reservations; returns how many there were."""
+    held = StockReservationModel.objects.filter(cart=cart)
+    product_ids = set(held.values_list("variant__product_id", flat=True))
+    deleted, _ = held.delete()
+    touch_products(product_ids)
+    return deleted
+
+
+def sweep_expired(batch_size=1000, now=None):
+    """
+    Delete expired reservations in primary-key batches, one short
+    transaction each. Yields the number deleted per batch.
+
+    Expired rows are already ignored by the availability checks; deleting
+    them keeps the table small and touches their products, so conditional
+    GETs see the stock come back (run it at least as often as the TTL).
+    """
+    now = now or timezone.now()
+    expired = StockReservationModel.objects.filter(expires_at__lte=now)
+    while True:
+        rows = list(
+            expired.order_by("pk").values_list("pk", "variant__product_id")[
+                :batch_size
+            ]
+        )
+        if not rows:
+            return
+        with transaction.atomic():
+            deleted, _ = StockReservationModel.objects.filter(
+                pk__in=[pk for pk, _ in rows]
+            ).delete()
+            touch_products({product_id for _, product_id in rows})
+        yield deleted
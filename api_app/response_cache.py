@@ -0,0 +1,138 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+STATS_KEYS = {"hit": "response-cache:hits", "miss": "response-cache:misses"}
+
+
+def _timeout():
+    return getattr(settings, "PRODUCT_CACHE_TIMEOUT", 600)
+
+
+# -------------------------------
+# VERSIONED NAMESPACES
+# -------------------------------
+def get_version(name):
+    version = cache.get(name)
+    if version is None:
+        cache.add(name, 1, None)
+        version = cache.get(name, 1)
+    return version
+
+
+def bump_version(name):
+    try:
+        cache.incr(name)
+    except ValueError:
+        cache.set(name, 2, None)
+
+
+def list_version_key(prefix):
+    return f"{prefix}:list-version"
+
+
+def detail_version_key(prefix, pk):
+    return f"{prefix}:detail-version:{pk}"
+
+
+def invalidate_list(prefix):
+    bump_version(list_version_key(prefix))
+
+
+def invalidate_detail(prefix, pks):
+    for pk in pks:
+        bump_version(detail_version_key(prefix, pk))
+
+
+# -------------------------------
+# HIT / MISS COUNTERS
+# -------------------------------
+def record(outcome):
+    key = STATS_KEYS[outcome]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    hits = values.get(STATS_KEYS["hit"], 0)
+    misses = values.get(STATS_KEYS["miss"], 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many(STATS_KEYS.values())
+
+
+# -------------------------------
+# VIEWSET MIXIN
+# -------------------------------
+class CachedResponseMixin:
+    """
+    Caches serialized `list` and `retrieve` responses.
+
+    List pages live under one version number per `response_cache_prefix`
+    and each detail under its own, so signal handlers can invalidate
+    precisely by bumping the right version (see api_app.signals).
+    """
+
+    response_cache_prefix = None
+
+    def _request_digest(self):
+        return hashlib.md5(self.request.build_absolute_uri().encode()).hexdigest()
+
+    def get_list_cache_key(self):
+        version = get_version(list_version_key(self.response_cache_prefix))
+        return f"{self.response_cache_prefix}:list:{version}:{self._request_digest()}"
+
+    def get_detail_cache_key(self, pk):
+        version = get_version(detail_version_key(self.response_cache_prefix, pk))
+        return (
+            f"{self.response_cache_prefix}:detail:{pk}:{version}:"
+            f"{self._request_digest()}"
+        )
+
+    def cached_response(self, cache_key, build_response):
+        data = cache.get(cache_key)
+        if data is not None:
+            record("hit")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        record("miss")
+        response = build_response()
+        if response.status_code == 200:
+            cache.set(cache_key, response.data, _timeout())
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.get_list_cache_key(),
+            partial(super().list, request, *args, **kwargs),
+        )
+
+    def get_detail_cache_id(self):
+        return self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.get_detail_cache_id()
+        if pk is None:
+            # Id not known yet (e.g. first hit on a slug): serve uncached
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(
+            self.get_detail_cache_key(pk),
+            partial(super().retrieve, request, *args, **kwargs),
+        )
@@ -0,0 +1,181 @@
+import html
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+
+FTS_TABLE = "api_app_product_fts"
+
+CREATE_FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name,
+    description,
+    brand,
+    category,
+    variants,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+DROP_FTS_TABLE_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+# Column weights for bm25(): name, description, brand, category, variants
+BM25_WEIGHTS = "10.0, 1.0, 4.0, 4.0, 2.0"
+
+
+def fts_available(using=connection):
+    """FTS5 index is only maintained on SQLite."""
+    return using.vendor == "sqlite"
+
+
+# Block-level tags get a space in front so "<h1>A</h1><p>B" reads "A B"
+BLOCK_TAG_RE = re.compile(
+    r"<(?=/?(?:p|div|br|hr|h[1-6]|li|ul|ol|tr|td|th|blockquote|pre)\b)",
+    re.IGNORECASE,
+)
+
+
+def html_to_text(value):
+    value = BLOCK_TAG_RE.sub(" <", value or "")
+    return " ".join(html.unescape(strip_tags(value)).split())
+
+
+def _product_row(product):
+    variants = " ".join(
+        f"{variant.material} {variant.color}"
+        for variant in product.variants.all()
+        if variant.is_active
+    )
+    return (
+        product.pk,
+        product.name,
+        html_to_text(product.description),
+        product.brand.name if product.brand else "",
+        product.category.name,
+        variants,
+    )
+
+
+def index_products(queryset):
+    """(Re)write the FTS rows for every product in `queryset`."""
+    if not fts_available():
+        return 0
+
+    products = queryset.select_related("brand", "category").prefetch_related(
+        "variants"
+    )
+    rows = [_product_row(product) for product in products]
+    if not rows:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, name, description, brand, category, variants) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+def remove_products(product_ids):
+    if not fts_available() or not product_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(product_id,) for product_id in product_ids],
+        )
+
+
+def rebuild_index():
+    from api_app.models import ProductModel
+
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    return index_products(ProductModel.objects.all())
+
+
+WORD_RE = re.compile(r"\w+")
+
+
+def build_match_query(terms):
+    """
+    Turn search terms into an FTS5 query: every word must match, and the
+    last one is treated as a prefix so search-as-you-type works.
+
+    Terms are reduced to their word characters first, so quotes, `*` and
+    other FTS5 syntax in user input can't produce an invalid query; an
+    empty string means nothing searchable was left.
+    """
+    words = [word for term in terms for word in WORD_RE.findall(term)]
+    if not words:
+        return ""
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def match_is_valid(match):
+    """Whether SQLite accepts `match` (checked with a one-row probe)."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT 1",
+                [match],
+            )
+    except OperationalError:
+        return False
+    return True
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the FTS5 index, ranked with bm25.
+
+    Matching products are annotated with `search_rank` (lower is better).
+    Input with no words matches nothing; a query FTS5 still rejects is a
+    400. Falls back to the regular icontains search on non-SQLite databases.
+    """
+
+    def is_ranked(self, request):
+        return fts_available() and bool(
+            build_match_query(self.get_search_terms(request))
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not fts_available():
+            return super().filter_queryset(request, queryset, view)
+
+        match = build_match_query(terms)
+        if not match:
+            # Only punctuation / operators: nothing can match
+            return queryset.none()
+        if not match_is_valid(match):
+            raise ValidationError({"search": "Invalid search query."})
+
+        product_table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({FTS_TABLE}, {BM25_WEIGHTS}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {product_table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
@@ -1,8 +1,11 @@
 from rest_framework.validators import UniqueValidator
 from rest_framework import serializers
-from django.db import transaction
 from api_app.models import *
 from django.utils import timezone
+from decimal import Decimal
+from api_app import images
+from api_app.checkout import place_order
+from api_app.unique import write_unique
 from .models import *
 
 
@@ -89,16 +92,15 @@ class UserCreateSerializer(serializers.ModelSerializer):
         if not base_username:
             base_username = "user"
 
-        username = base_username
-        counter = 1
-        while UserModel.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-
-        user = UserModel.objects.create_user(
-            email=email, username=username, password=password, **validated_data
+        return write_unique(
+            UserModel,
+            "username",
+            base_username,
+            lambda username: UserModel.objects.create_user(
+                email=email, username=username, password=password, **validated_data
+            ),
+            separator="",
         )
-        return user
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
@@ -121,22 +123,41 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """Original + thumb/medium WebP/JPEG URLs for an image field."""
+
+    def to_representation(self, value):
+        return images.srcset(value, self.context.get("request"))
+
+
 class CategorySerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image")
+
     class Meta:
         model = CategoryModel
-        fields = ["id", "name", "slug", "image", "description"]
+        fields = ["id", "name", "slug", "image", "image_srcset", "description"]
+
+
+class CategoryListSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image")
+
+    class Meta:
+        model = CategoryModel
+        fields = ["id", "name", "slug", "image", "image_srcset", "excerpt"]
 
 
 class BrandSerializer(serializers.ModelSerializer):
     class Meta:
         model = BrandModel
-        fields = ["id", "name", "slug"]
+        fields = ["id", "name", "slug", "excerpt"]
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source="image")
+
     class Meta:
         model = ProductImageModel
-        fields = ["id", "image"]
+        fields = ["id", "image", "image_srcset"]
 
 
 class ProductVariantSerializer(serializers.ModelSerializer):
@@ -203,6 +224,10 @@ class ProductSerializer(serializers.ModelSerializer):
         decimal_places=2,
         read_only=True,
     )
+    rating_histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    image_srcset = ImageSrcsetField(source="image")
 
     class Meta:
         model = ProductModel
@@ -212,6 +237,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "slug",
             "category",
             "image",
+            "image_srcset",
             "category_id",
             "brand",
             "brand_id",
@@ -221,10 +247,119 @@ class ProductSerializer(serializers.ModelSerializer):
             "warranty_years",
             "description",
             "is_featured",
+            "rating_avg",
+            "rating_count",
+            "rating_histogram",
             "images",
             "variants",
             "reviews",
         ]
+        read_only_fields = ["rating_avg", "rating_count"]
+
+
+# Lightweight version used by ProductViewSet.list
+class ProductListSerializer(serializers.ModelSerializer):
+    discounted_price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        read_only=True,
+    )
+    # Annotated by api_app.facets.annotate_availability
+    in_stock = serializers.BooleanField(read_only=True)
+    total_stock = serializers.IntegerField(read_only=True)
+    made_to_order = serializers.BooleanField(read_only=True)
+    min_delivery_days = serializers.IntegerField(read_only=True, allow_null=True)
+    image_srcset = ImageSrcsetField(source="image")
+
+    class Meta:
+        model = ProductModel
+        fields = [
+            "id",
+            "slug",
+            "name",
+            "image",
+            "image_srcset",
+            "price",
+            "discounted_price",
+            "rating_avg",
+            "rating_count",
+            "excerpt",
+            "in_stock",
+            "total_stock",
+            "made_to_order",
+            "min_delivery_days",
+        ]
+        read_only_fields = ["rating_avg", "rating_count"]
+
+
+class BulkPriceUpdateSerializer(serializers.Serializer):
+    """Which products to change (filters) and how (changes)."""
+
+    # Filters
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    category = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+    brand = serializers.ListField(child=serializers.IntegerField(), required=False)
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    all = serializers.BooleanField(default=False)
+
+    # Changes
+    discount_percent = serializers.IntegerField(
+        min_value=0, max_value=100, required=False
+    )
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False
+    )
+    price_change_percent = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=Decimal("-99"), required=False
+    )
+
+    filter_fields = ["ids", "category", "brand", "min_price", "max_price"]
+    change_fields = ["discount_percent", "price", "price_change_percent"]
+
+    def validate(self, data):
+        if not any(field in data for field in self.change_fields):
+            raise serializers.ValidationError(
+                "Pass discount_percent, price or price_change_percent."
+            )
+        if "price" in data and "price_change_percent" in data:
+            raise serializers.ValidationError(
+                "price and price_change_percent are mutually exclusive."
+            )
+        # Guard against an accidental site-wide change
+        if not data["all"] and not any(field in data for field in self.filter_fields):
+            raise serializers.ValidationError(
+                "Pass at least one filter, or all=true to change every product."
+            )
+        return data
+
+    def get_products(self):
+        data = self.validated_data
+        products = ProductModel.objects.all()
+        if "ids" in data:
+            products = products.filter(pk__in=data["ids"])
+        if "category" in data:
+            products = products.filter(category_id__in=data["category"])
+        if "brand" in data:
+            products = products.filter(brand_id__in=data["brand"])
+        if "min_price" in data:
+            products = products.filter(price__gte=data["min_price"])
+        if "max_price" in data:
+            products = products.filter(price__lte=data["max_price"])
+        return products
+
+    def get_changes(self):
+        return {
+            field: self.validated_data[field]
+            for field in self.change_fields
+            if field in self.validated_data
+        }
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -269,10 +404,10 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CartModel
-        fields = ["id", "items", "cart_total", "created_at"]
+        fields = ["id", "items", "item_count", "cart_total", "created_at"]
 
     def get_cart_total(self, obj):
-        return sum(item.total_price for item in obj.items.all())
+        return obj.subtotal
 
 
 # Read Only Version
@@ -297,15 +432,102 @@ class CartReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CartModel
-        fields = ["id", "user", "items", "total_amount", "created_at"]
+        fields = ["id", "user", "items", "item_count", "total_amount", "created_at"]
 
     def get_total_amount(self, obj):
-        return sum([item.total_price for item in obj.items.all()])
+        return obj.subtotal
 
 
 # Read Only Version ^
 
 
+class CatalogImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=["csv", "jsonl"], required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+    create_missing = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if "format" not in data:
+            # Fall back to the file extension
+            extension = data["file"].name.rsplit(".", 1)[-1].lower()
+            if extension not in ("csv", "jsonl"):
+                raise serializers.ValidationError(
+                    {"format": "format must be csv or jsonl."}
+                )
+            data["format"] = extension
+        return data
+
+
+class CartOperationSerializer(serializers.Serializer):
+    variant_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+    op = serializers.ChoiceField(choices=["add", "set", "remove"], default="add")
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > 100:
+            raise serializers.ValidationError("At most 100 operations per batch.")
+        return value
+
+
+class CartLineSerializer(serializers.ModelSerializer):
+    """
+    Compact cart line: just what the cart UI shows, read from the joined
+    row of api_app.carts.cart_lines (no nested product payload).
+    """
+
+    variant_id = serializers.IntegerField(read_only=True)
+    product_id = serializers.IntegerField(source="variant.product_id", read_only=True)
+    product_name = serializers.CharField(source="variant.product.name", read_only=True)
+    product_slug = serializers.CharField(source="variant.product.slug", read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+    material = serializers.CharField(source="variant.material", read_only=True)
+    color = serializers.CharField(source="variant.color", read_only=True)
+    total_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+    stock_status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CartItemModel
+        fields = [
+            "id",
+            "variant_id",
+            "product_id",
+            "product_name",
+            "product_slug",
+            "thumbnail",
+            "material",
+            "color",
+            "quantity",
+            "price",
+            "total_price",
+            "stock_status",
+        ]
+
+    def get_thumbnail(self, obj):
+        return images.thumbnail_url(
+            obj.variant.product.image, self.context.get("request")
+        )
+
+    def get_stock_status(self, obj):
+        variant = obj.variant
+        if variant.is_made_to_order:
+            return "made_to_order"
+        # Lines from cart_lines() / guest carts carry the stock left after
+        # other carts' reservations
+        available = getattr(obj, "available", variant.stock)
+        if available <= 0:
+            return "out_of_stock"
+        if available < obj.quantity:
+            return "insufficient"
+        return "in_stock"
+
+
 class ShippingAddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShippingAddressModel
@@ -385,63 +607,17 @@ class CheckoutSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         user = self.context["request"].user
-        cart = CartModel.objects.select_for_update().get(
-            id=validated_data["cart_id"], is_active=True
-        )
+        cart = CartModel.objects.get(id=validated_data["cart_id"])
         shipping_address = ShippingAddressModel.objects.get(
             id=validated_data["shipping_address_id"], user=user
         )
-        cart_items = CartItemModel.objects.select_related(
-            "variant", "variant__product"
-        ).filter(cart=cart)
-        if not cart_items.exists():
-            raise serializers.ValidationError("Cart is empty.")
-
-        with transaction.atomic():
-            total_amount = 0
-            for item in cart_items:
-                variant = ProductVariantModel.objects.select_for_update().get(
-                    id=item.variant.id
-                )
-                if not variant.is_made_to_order and variant.stock < item.quantity:
-                    raise serializers.ValidationError(
-                        f"Not enough stock for {variant.product.name}"
-                    )
-                if not variant.is_made_to_order:
-                    variant.stock -= item.quantity
-                    variant.save()
-
-                total_amount += item.total_price
-
-            order = OrderModel.objects.create(
-                user=user,
-                shipping_address=shipping_address,
-                total_amount=total_amount,
-                delivery_type=validated_data["delivery_type"],
-                status="pending",
-            )
-            for item in cart_items:
-                OrderItemModel.objects.create(
-                    order=order,
-                    product_name=item.variant.product.name,
-                    variant_details=f"{item.variant.material} / {item.variant.color}",
-                    price=item.price,
-                    quantity=item.quantity,
-                )
-
-            PaymentModel.objects.create(
-                order=order,
-                payment_method=validated_data["payment_method"],
-                payment_status="pending",
-                transaction_id=None,
-                paid_at=None,
-            )
-
-            # 🧹 CLOSE CART
-            cart.is_active = False
-            cart.save()
-            cart_items.delete()
-            return order
+        return place_order(
+            cart,
+            user,
+            shipping_address,
+            delivery_type=validated_data["delivery_type"],
+            payment_method=validated_data["payment_method"],
+        )
 
 
 class OtherdetailSerializer(serializers.ModelSerializer):
@@ -466,11 +642,6 @@ class OtherdetailSerializer(serializers.ModelSerializer):
 
 
 class BlogSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
-    author_id = serializers.PrimaryKeyRelatedField(
-        queryset=UserModel.objects.all(), source="author", write_only=True
-    )
-
     class Meta:
         model = BlogModel
         fields = [
@@ -479,8 +650,26 @@ class BlogSerializer(serializers.ModelSerializer):
             "slug",
             "image",
             "content",
-            "author",
-            "author_id",
+            "excerpt",
+            "word_count",
+            "reading_time",
+            "is_active",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class BlogListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogModel
+        fields = [
+            "id",
+            "title",
+            "slug",
+            "image",
+            "excerpt",
+            "word_count",
+            "reading_time",
             "is_active",
             "created_at",
             "updated_at",
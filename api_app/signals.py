@@ -0,0 +1,302 @@
+from functools import partial
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.db import transaction
+from django.db.models import QuerySet
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api_app import images, ratings, related, response_cache, search
+from api_app.cart_totals import refresh_cart_totals
+from api_app.lookups import forget_slug
+from api_app.models import (
+    BlogModel,
+    BrandModel,
+    CartItemModel,
+    CartModel,
+    CategoryModel,
+    ProductImageModel,
+    ProductModel,
+    ProductReviewModel,
+    ProductVariantModel,
+    RelatedProductModel,
+)
+
+
+# -------------------------------
+# FULL-TEXT SEARCH INDEX
+# -------------------------------
+@receiver(post_save, sender=ProductModel)
+def index_product(sender, instance, **kwargs):
+    search.index_products(ProductModel.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=ProductModel)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariantModel)
+@receiver(post_delete, sender=ProductVariantModel)
+def index_variant_product(sender, instance, **kwargs):
+    search.index_products(ProductModel.objects.filter(pk=instance.product_id))
+
+
+@receiver(post_save, sender=BrandModel)
+def index_brand_products(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(ProductModel.objects.filter(brand=instance))
+
+
+@receiver(post_save, sender=CategoryModel)
+def index_category_products(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(ProductModel.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=BrandModel)
+def remember_brand_products(sender, instance, **kwargs):
+    # Products are SET_NULL'd before post_delete fires, so grab them now
+    instance._indexed_product_ids = list(
+        instance.productmodel_set.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=BrandModel)
+def index_unbranded_products(sender, instance, **kwargs):
+    product_ids = getattr(instance, "_indexed_product_ids", [])
+    search.index_products(ProductModel.objects.filter(pk__in=product_ids))
+
+
+# -------------------------------
+# RATING AGGREGATES
+# -------------------------------
+@receiver(pre_save, sender=ProductReviewModel)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("product_id", "rating")
+            .first()
+        )
+
+
+@receiver(post_save, sender=ProductReviewModel)
+def update_product_rating(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if previous is None:
+        ratings.apply_rating_change(instance.product_id, added=instance.rating)
+    elif previous[0] != instance.product_id:
+        ratings.apply_rating_change(previous[0], removed=previous[1])
+        ratings.apply_rating_change(instance.product_id, added=instance.rating)
+    else:
+        ratings.apply_rating_change(
+            instance.product_id, added=instance.rating, removed=previous[1]
+        )
+
+
+@receiver(post_delete, sender=ProductReviewModel)
+def remove_product_rating(sender, instance, **kwargs):
+    ratings.apply_rating_change(instance.product_id, removed=instance.rating)
+
+
+# -------------------------------
+# CART TOTALS
+# -------------------------------
+# CartItemModel.save() refreshes its cart; deletes go through here so
+# cascades (a variant or product going away) and queryset deletes are
+# covered too.
+@receiver(post_delete, sender=CartItemModel)
+def refresh_cart_after_line_delete(sender, instance, origin=None, **kwargs):
+    # Nothing to refresh when the cart itself is being deleted
+    if isinstance(origin, CartModel) or (
+        isinstance(origin, QuerySet) and origin.model is CartModel
+    ):
+        return
+    refresh_cart_totals(instance.cart_id)
+
+
+# -------------------------------
+# PRODUCT LAST-MODIFIED
+# -------------------------------
+# Nested rows are part of the product detail response, so changing them
+# bumps the product's updated_at (used for ETag / Last-Modified).
+@receiver(post_save, sender=ProductVariantModel)
+@receiver(post_delete, sender=ProductVariantModel)
+@receiver(post_save, sender=ProductImageModel)
+@receiver(post_delete, sender=ProductImageModel)
+@receiver(post_save, sender=ProductReviewModel)
+@receiver(post_delete, sender=ProductReviewModel)
+def touch_product(sender, instance, **kwargs):
+    ProductModel.objects.filter(pk=instance.product_id).update(
+        updated_at=timezone.now()
+    )
+
+
+# -------------------------------
+# PRODUCT RESPONSE CACHE
+# -------------------------------
+PRODUCT_CACHE_PREFIX = "product"
+
+
+def invalidate_product_cache(product_ids):
+    response_cache.invalidate_detail(PRODUCT_CACHE_PREFIX, product_ids)
+    response_cache.invalidate_list(PRODUCT_CACHE_PREFIX)
+
+
+@receiver(post_save, sender=ProductModel)
+@receiver(post_delete, sender=ProductModel)
+def invalidate_product(sender, instance, **kwargs):
+    invalidate_product_cache([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariantModel)
+@receiver(post_delete, sender=ProductVariantModel)
+@receiver(post_save, sender=ProductImageModel)
+@receiver(post_delete, sender=ProductImageModel)
+@receiver(post_save, sender=ProductReviewModel)
+@receiver(post_delete, sender=ProductReviewModel)
+def invalidate_product_children(sender, instance, **kwargs):
+    invalidate_product_cache([instance.product_id])
+
+
+@receiver(post_save, sender=CategoryModel)
+@receiver(post_delete, sender=CategoryModel)
+def invalidate_category_products(sender, instance, **kwargs):
+    invalidate_product_cache(
+        ProductModel.objects.filter(category_id=instance.pk).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=BrandModel)
+@receiver(post_delete, sender=BrandModel)
+def invalidate_brand_products(sender, instance, **kwargs):
+    product_ids = getattr(instance, "_indexed_product_ids", None)
+    if product_ids is None:
+        product_ids = ProductModel.objects.filter(brand_id=instance.pk).values_list(
+            "pk", flat=True
+        )
+    invalidate_product_cache(product_ids)
+
+
+# -------------------------------
+# IMAGE DERIVATIVES
+# -------------------------------
+IMAGE_FIELD = {
+    ProductModel: "image",
+    ProductImageModel: "image",
+    CategoryModel: "image",
+    BrandModel: "logo",
+}
+
+
+@receiver(pre_save, sender=ProductModel)
+@receiver(pre_save, sender=ProductImageModel)
+@receiver(pre_save, sender=CategoryModel)
+@receiver(pre_save, sender=BrandModel)
+def remember_previous_image(sender, instance, **kwargs):
+    instance._previous_image = None
+    if instance.pk:
+        instance._previous_image = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list(IMAGE_FIELD[sender], flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=ProductModel)
+@receiver(post_save, sender=ProductImageModel)
+@receiver(post_save, sender=CategoryModel)
+@receiver(post_save, sender=BrandModel)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    image = getattr(instance, IMAGE_FIELD[sender])
+    previous = getattr(instance, "_previous_image", None)
+    # Saves that keep the same file leave its derivatives (and their
+    # cached state) alone; generate_image_derivatives retries failures
+    if image and image.name != previous:
+        transaction.on_commit(partial(images.schedule_derivatives, image.name))
+
+    # A replaced image leaves its derivatives behind, unless another row
+    # still uses the same file
+    if previous and previous != image.name and not _image_in_use(previous):
+        transaction.on_commit(partial(images.delete_derivatives, previous))
+
+
+def _image_in_use(name):
+    return any(
+        model.objects.filter(**{field: name}).exists()
+        for model, field in IMAGE_FIELD.items()
+    )
+
+
+# -------------------------------
+# RELATED PRODUCTS
+# -------------------------------
+@receiver(post_save, sender=ProductModel)
+def refresh_related_products(sender, instance, **kwargs):
+    transaction.on_commit(partial(related.refresh_for_products, [instance.pk]))
+
+
+@receiver(post_save, sender=ProductVariantModel)
+@receiver(post_delete, sender=ProductVariantModel)
+def refresh_variant_related_products(sender, instance, **kwargs):
+    transaction.on_commit(partial(related.refresh_for_products, [instance.product_id]))
+
+
+@receiver(pre_delete, sender=ProductModel)
+def remember_related_linkers(sender, instance, **kwargs):
+    # The rows pointing at this product cascade away with it
+    instance._related_linkers = list(
+        RelatedProductModel.objects.filter(related_id=instance.pk).values_list(
+            "product_id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=ProductModel)
+def refresh_related_linkers(sender, instance, **kwargs):
+    linkers = getattr(instance, "_related_linkers", [])
+    if linkers:
+        transaction.on_commit(partial(related.refresh_related, linkers))
+
+
+# -------------------------------
+# SLUG -> ID MAP
+# -------------------------------
+SLUG_CACHE_PREFIXES = {
+    ProductModel: "product",
+    CategoryModel: "category",
+    BlogModel: "blog",
+}
+
+
+@receiver(pre_save, sender=ProductModel)
+@receiver(pre_save, sender=CategoryModel)
+@receiver(pre_save, sender=BlogModel)
+def remember_previous_slug(sender, instance, **kwargs):
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("slug", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=ProductModel)
+@receiver(post_save, sender=CategoryModel)
+@receiver(post_save, sender=BlogModel)
+def forget_renamed_slug(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_slug", None)
+    if previous and previous != instance.slug:
+        forget_slug(SLUG_CACHE_PREFIXES[sender], previous)
+
+
+@receiver(post_delete, sender=ProductModel)
+@receiver(post_delete, sender=CategoryModel)
+@receiver(post_delete, sender=BlogModel)
+def forget_deleted_slug(sender, instance, **kwargs):
+    forget_slug(SLUG_CACHE_PREFIXES[sender], instance.slug)
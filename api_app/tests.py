@@ -1,3 +1,930 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api_app import (
+    carts,
+    guest_carts,
+    images,
+    lookups,
+    pricing,
+    reservations,
+    unique,
+)
+from api_app.checkout import place_order
+from api_app.facets import annotate_availability
+
+from api_app.models import (
+    BlogModel,
+    BrandModel,
+    CartItemModel,
+    CartModel,
+    CategoryModel,
+    OrderItemModel,
+    ProductModel,
+    ProductReviewModel,
+    ProductVariantModel,
+    ShippingAddressModel,
+    StockReservationModel,
+    UserModel,
+)
+from api_app.serializers import CartLineSerializer
+
+
+class PlaceOrderQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            email="buyer@example.com",
+            username="buyer",
+            password="secret",
+            first_name="Buyer",
+            last_name="One",
+            phone_number="9800000001",
+        )
+        ShippingAddressModel.objects.create(
+            user=self.user,
+            name="Buyer One",
+            phone_number="9800000001",
+            address_line="Street 1",
+            city="Kathmandu",
+            state="Bagmati",
+            postal_code="44600",
+        )
+        self.category = CategoryModel.objects.create(name="Chairs")
+        self.brand = BrandModel.objects.create(name="Acme")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fill_cart(self, size):
+        cart = CartModel.objects.create(user=self.user)
+        variants = []
+        for i in range(size):
+            product = ProductModel.objects.create(
+                name=f"Chair {i}",
+                category=self.category,
+                brand=self.brand,
+                price=Decimal("100.00"),
+            )
+            variants.append(
+                ProductVariantModel.objects.create(
+                    product=product,
+                    stock=5,
+                    is_made_to_order=i % 3 == 2,
+                )
+            )
+        for variant in variants:
+            CartItemModel.objects.create(cart=cart, variant=variant, quantity=2)
+        return cart, variants
+
+    def place_order(self):
+        return self.client.post(
+            reverse("api_place_order"), {"delivery_type": "express"}, format="json"
+        )
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        for size in (1, 8):
+            with self.subTest(size=size):
+                cart, variants = self.fill_cart(size)
+                with self.assertNumQueries(12):
+                    response = self.place_order()
+                self.assertEqual(response.status_code, 201, response.data)
+
+                cart.refresh_from_db()
+                self.assertFalse(cart.is_active)
+                self.assertEqual(
+                    OrderItemModel.objects.filter(
+                        order_id=response.data["order_id"]
+                    ).count(),
+                    size,
+                )
+                for variant in variants:
+                    variant.refresh_from_db()
+                    self.assertEqual(variant.stock, 5 if variant.is_made_to_order else 3)
+
+    def test_short_stock_rolls_back(self):
+        cart, variants = self.fill_cart(2)
+        ProductVariantModel.objects.filter(pk=variants[1].pk).update(stock=1)
+
+        response = self.place_order()
+
+        self.assertEqual(response.status_code, 400)
+        cart.refresh_from_db()
+        self.assertTrue(cart.is_active)
+        variants[0].refresh_from_db()
+        self.assertEqual(variants[0].stock, 5)
+        self.assertFalse(OrderItemModel.objects.exists())
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            email="shopper@example.com",
+            username="shopper",
+            password="secret",
+            first_name="Shop",
+            last_name="Per",
+            phone_number="9800000002",
+        )
+        category = CategoryModel.objects.create(name="Sofas")
+        self.product = ProductModel.objects.create(
+            name="Velvet sofa", category=category, price=Decimal("500.00")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, term):
+        return self.client.get("/api/products/", {"search": term})
+
+    def test_words_match(self):
+        response = self.search("velv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], [self.product.pk]
+        )
+
+    def test_syntax_only_input_matches_nothing(self):
+        for term in ['"', "*", "-+(),.:", '""*']:
+            with self.subTest(term=term):
+                response = self.search(term)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["results"], [])
+
+    def test_operators_inside_words_are_ignored(self):
+        response = self.search('"velvet* OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.staff = UserModel.objects.create_user(
+            email="staff@example.com",
+            username="staff",
+            password="secret",
+            first_name="Staff",
+            last_name="User",
+            phone_number="9800000003",
+            is_staff=True,
+        )
+        CategoryModel.objects.create(name="Lamps")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def upload(self, **data):
+        rows = b'{"name": "Desk lamp", "category": "Lamps", "price": "50"}\n'
+        return self.client.post(
+            "/api/products/import/",
+            {"file": SimpleUploadedFile("catalog.jsonl", rows), **data},
+            format="multipart",
+        )
+
+    def test_invalid_batch_size_is_rejected(self):
+        for batch_size in ["abc", "0", "-5", "100000"]:
+            with self.subTest(batch_size=batch_size):
+                response = self.upload(batch_size=batch_size)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("batch_size", response.data)
+        self.assertFalse(ProductModel.objects.exists())
+
+    def test_valid_batch_size_imports(self):
+        response = self.upload(batch_size="10")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(ProductModel.objects.filter(name="Desk lamp").exists())
+
+
+class UniqueValueTests(TestCase):
+    def make(self, *slugs):
+        for slug in slugs:
+            BrandModel.objects.create(name=slug, slug=slug)
+
+    def test_first_value_is_the_base(self):
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak")
+
+    def test_suffixes_count_up(self):
+        self.make("oak")
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak-1")
+        self.make("oak-1", "oak-2")
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak-3")
+
+    def test_highest_suffix_wins_numerically(self):
+        # "oak-10" sorts before "oak-9" as text
+        self.make("oak", "oak-9", "oak-10")
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak-11")
+
+    def test_gaps_are_not_refilled(self):
+        self.make("oak", "oak-2", "oak-5")
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak-6")
+
+    def test_other_values_sharing_the_prefix_are_ignored(self):
+        self.make("oak-table", "oak-table-3", "oakwood")
+        self.assertEqual(unique.unique_value(BrandModel, "slug", "oak"), "oak")
+
+    def test_exclude_pk_keeps_own_value(self):
+        self.make("oak")
+        own = BrandModel.objects.get(slug="oak")
+        self.assertEqual(
+            unique.unique_value(BrandModel, "slug", "oak", exclude_pk=own.pk), "oak"
+        )
+
+    def racing_unique_value(self, races):
+        """unique_value() whose answer a concurrent writer takes `races` times."""
+        real = unique.unique_value
+        picked = []
+
+        def racing(*args, **kwargs):
+            value = real(*args, **kwargs)
+            if len(picked) < races:
+                BrandModel.objects.create(name=f"other {value}", slug=value)
+            picked.append(value)
+            return value
+
+        return mock.patch.object(unique, "unique_value", racing), picked
+
+    def create_brand(self, value):
+        return BrandModel.objects.create(name=f"oak {value}", slug=value)
+
+    def test_collision_is_retried_with_the_next_value(self):
+        patch, picked = self.racing_unique_value(races=1)
+        with patch:
+            brand = unique.write_unique(BrandModel, "slug", "oak", self.create_brand)
+
+        self.assertEqual(picked, ["oak", "oak-1"])
+        self.assertEqual(brand.slug, "oak-1")
+
+    def test_gives_up_after_max_attempts(self):
+        patch, picked = self.racing_unique_value(races=unique.MAX_ATTEMPTS)
+        with patch, self.assertRaises(IntegrityError):
+            unique.write_unique(BrandModel, "slug", "oak", self.create_brand)
+        self.assertEqual(len(picked), unique.MAX_ATTEMPTS)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        attempts = []
+
+        def write(value):
+            attempts.append(value)
+            raise IntegrityError("NOT NULL constraint failed")
+
+        with self.assertRaises(IntegrityError):
+            unique.write_unique(BrandModel, "slug", "oak", write)
+        self.assertEqual(attempts, ["oak"])
+
+    def test_saved_models_get_suffixed_slugs(self):
+        first = BlogModel.objects.create(title="Oak")
+        second = BlogModel.objects.create(title="Oak")
+        self.assertEqual((first.slug, second.slug), ("oak", "oak-1"))
+
+    def test_bases_longer_than_the_field_keep_counting(self):
+        title = "Modern three seater velvet sofa with solid oak legs in grey"
+        slugs = [BlogModel.objects.create(title=title).slug for _ in range(3)]
+        max_length = BlogModel._meta.get_field("slug").max_length
+        stem = slugs[0]
+        self.assertTrue(title.lower().replace(" ", "-").startswith(stem))
+        self.assertEqual(slugs, [stem, f"{stem}-1", f"{stem}-2"])
+        self.assertTrue(all(len(slug) <= max_length for slug in slugs))
+
+class CartWriteTests(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            email="shopper@example.com",
+            username="shopper",
+            password="secret",
+            first_name="Shop",
+            last_name="Per",
+            phone_number="9800000002",
+        )
+        category = CategoryModel.objects.create(name="Tables")
+        brand = BrandModel.objects.create(name="Birch")
+        self.product = ProductModel.objects.create(
+            name="Table", category=category, brand=brand, price=Decimal("50.00")
+        )
+        self.variant = ProductVariantModel.objects.create(product=self.product, stock=5)
+        self.cart = CartModel.objects.create(user=self.user)
+
+    def locks_cart(self):
+        return mock.patch.object(
+            CartModel.objects,
+            "select_for_update",
+            wraps=CartModel.objects.select_for_update,
+        )
+
+    def test_batch_operations_lock_the_cart(self):
+        with self.locks_cart() as lock:
+            carts.apply_cart_operations(
+                self.cart, [{"variant_id": self.variant.pk, "quantity": 2, "op": "add"}]
+            )
+        lock.assert_called_once_with()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.item_count, 2)
+
+    def writes(self, queries):
+        return [
+            query["sql"].split(" ", 3)[:3]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def test_add_is_one_upsert(self):
+        with CaptureQueriesContext(connection) as queries:
+            line = carts.change_line_quantity(self.cart, self.variant, 2)
+        # The upsert, then the cart totals
+        self.assertEqual(
+            self.writes(queries),
+            [
+                ["INSERT", "INTO", '"api_app_cartitemmodel"'],
+                ["UPDATE", '"api_app_cartmodel"', "SET"],
+            ],
+        )
+        self.assertEqual(line.quantity, 2)
+
+        # A line that already exists (e.g. inserted by a concurrent first
+        # add) is incremented by the same statement instead of colliding
+        line = carts.change_line_quantity(self.cart, self.variant, 1)
+        self.assertEqual(line.quantity, 3)
+        line = carts.change_line_quantity(self.cart, self.variant, 1, mode="set")
+        self.assertEqual(line.quantity, 1)
+        self.assertEqual(CartItemModel.objects.count(), 1)
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.item_count, 1)
+
+    def test_refusal_on_an_existing_line_changes_nothing(self):
+        CartItemModel.objects.create(cart=self.cart, variant=self.variant, quantity=4)
+        with CaptureQueriesContext(connection) as queries:
+            line = carts.change_line_quantity(self.cart, self.variant, 2)
+        self.assertIsNone(line)
+        self.assertEqual(self.variant.available, 5)
+        # Only the refused upsert; no retry and no totals refresh
+        self.assertEqual(
+            self.writes(queries), [["INSERT", "INTO", '"api_app_cartitemmodel"']]
+        )
+        self.assertEqual(CartItemModel.objects.get().quantity, 4)
+
+    def test_refusal_on_a_new_line_inserts_nothing(self):
+        self.assertIsNone(carts.change_line_quantity(self.cart, self.variant, 6))
+        self.assertFalse(CartItemModel.objects.exists())
+
+    def test_stock_is_read_by_the_statement(self):
+        # Stock sold after the caller loaded the variant is still seen,
+        # on both the insert and the update path
+        ProductVariantModel.objects.filter(pk=self.variant.pk).update(stock=2)
+
+        self.assertIsNone(carts.change_line_quantity(self.cart, self.variant, 3))
+        self.assertEqual(self.variant.available, 2)
+        carts.change_line_quantity(self.cart, self.variant, 1)
+        self.assertIsNone(carts.change_line_quantity(self.cart, self.variant, 2))
+        self.assertEqual(CartItemModel.objects.get().quantity, 1)
+
+    def test_quantity_below_one_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        line = CartItemModel.objects.create(cart=self.cart, variant=self.variant)
+        for quantity in (0, -1, "two"):
+            with self.subTest(quantity=quantity):
+                response = client.post(
+                    "/api/cart/add/",
+                    {"product_id": self.product.pk, "quantity": quantity},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 400)
+                response = client.post(
+                    "/api/cart/update/",
+                    {"item_id": line.pk, "quantity": quantity},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(CartItemModel.objects.get().quantity, 1)
+
+
+class CartTotalsTests(TestCase):
+    def setUp(self):
+        user = UserModel.objects.create_user(
+            email="totals@example.com",
+            username="totals",
+            password="secret",
+            first_name="Tot",
+            last_name="Als",
+            phone_number="9800000003",
+        )
+        category = CategoryModel.objects.create(name="Lamps")
+        brand = BrandModel.objects.create(name="Lumen")
+        self.products = [
+            ProductModel.objects.create(
+                name=f"Lamp {i}", category=category, brand=brand, price=Decimal("10.00")
+            )
+            for i in range(2)
+        ]
+        self.variants = [
+            ProductVariantModel.objects.create(product=product, stock=10)
+            for product in self.products
+        ]
+        self.cart = CartModel.objects.create(user=user)
+
+    def assertTotals(self, item_count, subtotal):
+        self.cart.refresh_from_db()
+        self.assertEqual(
+            (self.cart.item_count, self.cart.subtotal), (item_count, Decimal(subtotal))
+        )
+        lines = CartItemModel.objects.filter(cart=self.cart)
+        self.assertEqual(self.cart.item_count, sum(line.quantity for line in lines))
+        self.assertEqual(self.cart.subtotal, sum((line.total_price for line in lines), 0))
+
+    def test_add_update_and_remove(self):
+        line = CartItemModel.objects.create(
+            cart=self.cart, variant=self.variants[0], quantity=2
+        )
+        carts.change_line_quantity(self.cart, self.variants[1], 1)
+        self.assertTotals(3, "30.00")
+
+        line.quantity = 4
+        line.save()
+        self.assertTotals(5, "50.00")
+
+        line.delete()
+        self.assertTotals(1, "10.00")
+
+    def test_queryset_delete(self):
+        for variant in self.variants:
+            CartItemModel.objects.create(cart=self.cart, variant=variant)
+        self.cart.items.all().delete()
+        self.assertTotals(0, "0.00")
+
+    def test_cascade_delete(self):
+        for variant in self.variants:
+            CartItemModel.objects.create(cart=self.cart, variant=variant)
+        self.variants[0].delete()
+        self.assertTotals(1, "10.00")
+        self.products[1].delete()
+        self.assertTotals(0, "0.00")
+
+    def test_reprice(self):
+        for variant in self.variants:
+            CartItemModel.objects.create(cart=self.cart, variant=variant, quantity=2)
+        pricing.bulk_reprice(
+            ProductModel.objects.filter(pk=self.products[0].pk), discount_percent=50
+        )
+        self.assertTotals(4, "30.00")
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.users = [
+            UserModel.objects.create_user(
+                email=f"holder{i}@example.com",
+                username=f"holder{i}",
+                password="secret",
+                first_name="Hold",
+                last_name="Er",
+                phone_number=f"980000001{i}",
+            )
+            for i in range(2)
+        ]
+        category = CategoryModel.objects.create(name="Sofas")
+        brand = BrandModel.objects.create(name="Plush")
+        self.product = ProductModel.objects.create(
+            name="Sofa", category=category, brand=brand, price=Decimal("200.00")
+        )
+        self.variant = ProductVariantModel.objects.create(product=self.product, stock=5)
+        self.cart, self.other = [CartModel.objects.create(user=user) for user in self.users]
+
+    def hold(self, cart, quantity, minutes=15):
+        return StockReservationModel.objects.create(
+            cart=cart,
+            variant=self.variant,
+            quantity=quantity,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def add(self, operations):
+        return [
+            {"variant_id": self.variant.pk, "quantity": quantity, "op": "add"}
+            for quantity in operations
+        ]
+
+    def test_other_carts_reservations_limit_every_add(self):
+        self.hold(self.other, 4)
+
+        self.assertIsNone(carts.change_line_quantity(self.cart, self.variant, 2))
+        self.assertEqual(self.variant.available, 1)
+        with self.assertRaises(ValidationError):
+            carts.apply_cart_operations(self.cart, self.add([2]))
+        with self.assertRaises(ValidationError):
+            guest_carts.apply_guest_operations(guest_carts.new_token(), self.add([2]))
+
+        line = carts.change_line_quantity(self.cart, self.variant, 1)
+        self.assertEqual(line.quantity, 1)
+
+    def test_existing_lines_are_held_to_available_stock(self):
+        CartItemModel.objects.create(cart=self.cart, variant=self.variant, quantity=1)
+        self.hold(self.other, 4)
+        line = carts.change_line_quantity(self.cart, self.variant, 1, mode="set")
+        self.assertEqual(line.quantity, 1)
+        self.assertIsNone(carts.change_line_quantity(self.cart, self.variant, 1))
+
+    def test_expired_reservations_are_ignored(self):
+        self.hold(self.other, 5, minutes=-1)
+        line = carts.change_line_quantity(self.cart, self.variant, 5)
+        self.assertEqual(line.quantity, 5)
+
+    def test_own_reservation_is_not_counted(self):
+        CartItemModel.objects.create(cart=self.cart, variant=self.variant, quantity=2)
+        reservations.reserve_cart(self.cart)
+
+        line = carts.change_line_quantity(self.cart, self.variant, 3)
+        self.assertEqual(line.quantity, 5)
+        carts.apply_cart_operations(
+            self.cart, [{"variant_id": self.variant.pk, "quantity": 5, "op": "set"}]
+        )
+        with self.assertRaises(ValidationError):
+            reservations.reserve_cart(self.other)
+
+    def test_stock_status_and_product_availability(self):
+        CartItemModel.objects.create(cart=self.cart, variant=self.variant, quantity=2)
+        held = self.hold(self.other, 4)
+
+        line = carts.cart_lines(self.cart).get()
+        self.assertEqual(CartLineSerializer(line).data["stock_status"], "insufficient")
+        product = annotate_availability(ProductModel.objects.filter(pk=self.product.pk))
+        self.assertEqual(
+            product.values_list("total_stock", "in_stock").get(), (1, True)
+        )
+
+        StockReservationModel.objects.filter(pk=held.pk).update(quantity=5)
+        line = carts.cart_lines(self.cart).get()
+        self.assertEqual(CartLineSerializer(line).data["stock_status"], "out_of_stock")
+        self.assertEqual(
+            product.values_list("total_stock", "in_stock").get(), (0, False)
+        )
+
+    def test_reservations_change_the_product_validators(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        CartItemModel.objects.create(cart=self.other, variant=self.variant, quantity=2)
+
+        def get(etag, total_stock=None):
+            response = client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+            if total_stock is not None:
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.data["results"][0]["total_stock"], total_stock
+                )
+            return response
+
+        etag = get("", total_stock=5).headers["ETag"]
+        self.assertEqual(get(etag).status_code, 304)
+
+        reservations.reserve_cart(self.other)
+        etag = get(etag, total_stock=3).headers["ETag"]
+
+        # Expiry shows up once the sweep has run
+        StockReservationModel.objects.update(expires_at=timezone.now())
+        list(reservations.sweep_expired())
+        get(etag, total_stock=5)
+
+    def test_sweep_removes_only_expired(self):
+        self.hold(self.cart, 1, minutes=-1)
+        kept = self.hold(self.other, 1)
+
+        self.assertEqual(list(reservations.sweep_expired(batch_size=1)), [1])
+        self.assertEqual(
+            list(StockReservationModel.objects.values_list("pk", flat=True)), [kept.pk]
+        )
+
+    def test_placing_the_order_releases_the_reservation(self):
+        CartItemModel.objects.create(cart=self.cart, variant=self.variant, quantity=2)
+        reservations.reserve_cart(self.cart)
+        self.hold(self.other, 3)
+        address = ShippingAddressModel.objects.create(
+            user=self.users[0],
+            name="Hold Er",
+            phone_number="9800000010",
+            address_line="Street 2",
+            city="Pokhara",
+            state="Gandaki",
+            postal_code="33700",
+        )
+
+        place_order(self.cart, self.users[0], address)
+
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, 3)
+        self.assertFalse(StockReservationModel.objects.filter(cart=self.cart).exists())
+        self.assertTrue(StockReservationModel.objects.filter(cart=self.other).exists())
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_derivatives_are_not_rechecked_on_every_call(self):
+        with mock.patch.object(
+            images.default_storage, "exists", return_value=False
+        ) as exists:
+            self.assertFalse(images.derivatives_ready("products/chair.jpg"))
+            self.assertFalse(images.derivatives_ready("products/chair.jpg"))
+        self.assertEqual(exists.call_count, 1)
+
+    def scheduled(self, callbacks):
+        return [
+            callback.args[0]
+            for callback in callbacks
+            if getattr(callback, "func", None) is images.schedule_derivatives
+        ]
+
+    def test_only_a_new_file_is_scheduled(self):
+        category = CategoryModel.objects.create(name="Beds")
+        brand = BrandModel.objects.create(name="Dream")
+        with self.captureOnCommitCallbacks() as callbacks:
+            product = ProductModel.objects.create(
+                name="Bed",
+                category=category,
+                brand=brand,
+                price=Decimal("300.00"),
+                image="products/bed.jpg",
+            )
+        self.assertEqual(self.scheduled(callbacks), ["products/bed.jpg"])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.name = "Double bed"
+            product.save()
+        self.assertEqual(self.scheduled(callbacks), [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.image = "products/bed-2.jpg"
+            product.save()
+        self.assertEqual(self.scheduled(callbacks), ["products/bed-2.jpg"])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(
+            email="reader@example.com",
+            username="reader",
+            password="secret",
+            first_name="Rea",
+            last_name="Der",
+            phone_number="9800000020",
+        )
+        self.category = CategoryModel.objects.create(name="Shelves")
+        self.brand = BrandModel.objects.create(name="Pine")
+        self.product = ProductModel.objects.create(
+            name="Shelf",
+            category=self.category,
+            brand=self.brand,
+            price=Decimal("80.00"),
+        )
+        ProductVariantModel.objects.create(product=self.product, stock=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.urls = ["/api/products/", f"/api/products/{self.product.slug}/"]
+
+    def etags(self):
+        etags = {}
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags[url] = response.headers["ETag"]
+        return etags
+
+    def statuses(self, etags):
+        return [
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+            for url, etag in etags.items()
+        ]
+
+    def test_matching_etag_is_not_modified(self):
+        self.assertEqual(self.statuses(self.etags()), [304, 304])
+
+    def test_changes_to_the_product_or_its_relations_are_seen(self):
+        def rename(instance, name):
+            instance.name = name
+            instance.save()
+
+        changes = {
+            "product": lambda: rename(self.product, "Tall shelf"),
+            "category": lambda: rename(self.category, "Shelving"),
+            "brand": lambda: rename(self.brand, "Pinewood"),
+            "review": lambda: ProductReviewModel.objects.create(
+                product=self.product, user=self.user, rating=4
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                etags = self.etags()
+                change()
+                self.assertEqual(self.statuses(etags), [200, 200])
+
+
+class ProductResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = UserModel.objects.create_user(
+            email="editor@example.com",
+            username="editor",
+            password="secret",
+            first_name="Edi",
+            last_name="Tor",
+            phone_number="9800000030",
+            is_staff=True,
+        )
+        category = CategoryModel.objects.create(name="Desks")
+        brand = BrandModel.objects.create(name="Maple")
+        self.product = ProductModel.objects.create(
+            name="Desk", category=category, brand=brand, price=Decimal("120.00")
+        )
+        self.variant = ProductVariantModel.objects.create(product=self.product, stock=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.list_url = "/api/products/"
+        self.detail_url = f"/api/products/{self.product.pk}/"
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertCached(self):
+        for url in (self.list_url, self.detail_url):
+            self.get(url)
+            self.assertEqual(self.get(url).headers["X-Cache"], "HIT")
+
+    def test_patch_invalidates_detail_and_list(self):
+        self.assertCached()
+
+        response = self.client.patch(
+            self.detail_url, {"price": "90.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        detail = self.get(self.detail_url)
+        self.assertEqual(detail.headers["X-Cache"], "MISS")
+        self.assertEqual(Decimal(detail.data["price"]), Decimal("90.00"))
+        listing = self.get(self.list_url)
+        self.assertEqual(listing.headers["X-Cache"], "MISS")
+        self.assertEqual(Decimal(listing.data["results"][0]["price"]), Decimal("90.00"))
+
+    def test_nested_changes_invalidate_the_detail(self):
+        self.assertCached()
+        self.variant.stock = 7
+        self.variant.save()
+
+        detail = self.get(self.detail_url)
+        self.assertEqual(detail.headers["X-Cache"], "MISS")
+        self.assertEqual(detail.data["variants"][0]["stock"], 7)
+
+    def test_slug_rename_drops_the_old_slug(self):
+        old_slug = self.product.slug
+        old_key = lookups.slug_cache_key("product", old_slug)
+        response = self.get(f"/api/products/{old_slug}/")
+        self.assertEqual(response.data["id"], self.product.pk)
+        self.assertEqual(cache.get(old_key), self.product.pk)
+
+        response = self.client.patch(
+            self.detail_url, {"slug": "standing-desk"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertIsNone(cache.get(old_key))
+        response = self.client.get(f"/api/products/{old_slug}/")
+        self.assertEqual(response.status_code, 404)
+        renamed = self.get("/api/products/standing-desk/")
+        self.assertEqual(renamed.data["id"], self.product.pk)
+        self.assertEqual(self.get(self.detail_url).data["slug"], "standing-desk")
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = UserModel.objects.create_user(
+            email="browser@example.com",
+            username="browser",
+            password="secret",
+            first_name="Bro",
+            last_name="Wser",
+            phone_number="9800000040",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        seating = CategoryModel.objects.create(name="Seating")
+        storage = CategoryModel.objects.create(name="Storage")
+        brand = BrandModel.objects.create(name="Cedar")
+
+        def product(name, category, price, variants, **extra):
+            product = ProductModel.objects.create(
+                name=name, category=category, brand=brand, price=price, **extra
+            )
+            for variant in variants:
+                ProductVariantModel.objects.create(product=product, **variant)
+            return product
+
+        # in stock, ships in 5 days
+        self.stool = product(
+            "Stool",
+            seating,
+            Decimal("1000"),
+            [{"stock": 2, "material": "oak", "color": "red", "delivery_days": 5}],
+        )
+        # made to order: in stock without stock, slow
+        self.bench = product(
+            "Bench",
+            seating,
+            Decimal("6000"),
+            [{"is_made_to_order": True, "material": "pine", "delivery_days": 20}],
+            is_featured=True,
+        )
+        # the stocked variant is inactive, so out of stock
+        self.crate = product(
+            "Crate",
+            storage,
+            Decimal("1000"),
+            [
+                {"stock": 5, "material": "oak", "is_active": False, "delivery_days": 1},
+                {"stock": 0, "material": "pine", "delivery_days": 3},
+            ],
+        )
+        # only an inactive variant: no stock, no delivery estimate
+        self.chest = product(
+            "Chest",
+            storage,
+            Decimal("30000"),
+            [{"stock": 4, "material": "teak", "is_active": False, "delivery_days": 1}],
+        )
+
+    def ids(self, query):
+        response = self.client.get(f"/api/products/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.data["results"]}
+
+    def test_availability_annotations(self):
+        rows = {
+            row["id"]: row
+            for row in annotate_availability(ProductModel.objects.all()).values(
+                "id", "total_stock", "made_to_order", "min_delivery_days", "in_stock"
+            )
+        }
+        expected = {
+            self.stool.pk: (2, False, 5, True),
+            self.bench.pk: (0, True, 20, True),
+            self.crate.pk: (0, False, 3, False),
+            self.chest.pk: (0, False, None, False),
+        }
+        for pk, values in expected.items():
+            row = rows[pk]
+            self.assertEqual(
+                (
+                    row["total_stock"],
+                    row["made_to_order"],
+                    row["min_delivery_days"],
+                    row["in_stock"],
+                ),
+                values,
+            )
+
+    def test_filters(self):
+        self.assertEqual(self.ids("in_stock=true"), {self.stool.pk, self.bench.pk})
+        self.assertEqual(self.ids("in_stock=false"), {self.crate.pk, self.chest.pk})
+        self.assertEqual(
+            self.ids("max_delivery_days=5"), {self.stool.pk, self.crate.pk}
+        )
+
+    def test_facet_counts(self):
+        response = self.client.get("/api/products/facets/")
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+
+        self.assertEqual(data["total"], 4)
+        self.assertEqual(
+            [(row["name"], row["count"]) for row in data["category"]],
+            [("Seating", 2), ("Storage", 2)],
+        )
+        self.assertEqual([row["count"] for row in data["brand"]], [4])
+        # Inactive variants (the chest's teak) don't count
+        self.assertEqual(
+            [(row["value"], row["count"]) for row in data["material"]],
+            [("pine", 2), ("oak", 1)],
+        )
+        self.assertEqual(
+            {row["label"]: row["count"] for row in data["price"]},
+            {
+                "0-5000": 2,
+                "5000-10000": 1,
+                "10000-25000": 0,
+                "25000-50000": 1,
+                "50000+": 0,
+            },
+        )
+        self.assertEqual(data["in_stock"], {"true": 2, "false": 2})
+        self.assertEqual(data["is_featured"], {"true": 1, "false": 3})
 
-# Create your tests here.
+        filtered = self.client.get("/api/products/facets/?in_stock=true").data
+        self.assertEqual(filtered["total"], 2)
+        self.assertEqual(filtered["in_stock"], {"true": 2, "false": 0})
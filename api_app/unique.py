@@ -0,0 +1,84 @@
+import re
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Length
+
+MAX_ATTEMPTS = 5
+# Room kept free after a long base so suffixes up to 9999 never have to
+# cut into it
+SUFFIX_DIGITS = 4
+
+
+def unique_value(model, field, base, separator="-", exclude_pk=None):
+    """
+    Next free value of `field` among `base`, `base{sep}1`, `base{sep}2`...
+
+    One query: the highest existing suffix is found by ordering the
+    matches by length and then value, so "chair-10" beats "chair-9".
+    A base that would leave no room for a suffix is shortened first, so
+    every value shares the same base and keeps matching the pattern.
+    """
+    max_length = model._meta.get_field(field).max_length
+    base = base or model._meta.model_name.removesuffix("model")
+    if max_length is not None:
+        base = base[: max_length - len(separator) - SUFFIX_DIGITS]
+    pattern = rf"^{re.escape(base)}({re.escape(separator)}[0-9]+)?$"
+
+    taken = model._default_manager.filter(
+        **{f"{field}__startswith": base, f"{field}__regex": pattern}
+    )
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    last = (
+        taken.order_by(Length(field).desc(), f"-{field}")
+        .values_list(field, flat=True)
+        .first()
+    )
+    if last is None:
+        return base
+
+    counter = 1 if last == base else int(last[len(base) + len(separator) :]) + 1
+    suffix = f"{separator}{counter}"
+    if max_length is not None:
+        base = base[: max_length - len(suffix)]
+    return base + suffix
+
+
+def write_unique(model, field, base, write, separator="-", exclude_pk=None):
+    """
+    Call `write(value)` with a free value, retrying with the next one when
+    a concurrent writer took it first. Returns whatever `write` returns.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        value = unique_value(model, field, base, separator, exclude_pk)
+        try:
+            with transaction.atomic():
+                return write(value)
+        except IntegrityError:
+            # Only a collision on `field` is worth retrying; anything else
+            # (e.g. a duplicate email) goes back to the caller
+            collided = (
+                model._default_manager.filter(**{field: value})
+                .exclude(pk=exclude_pk)
+                .exists()
+            )
+            if not collided or attempt == MAX_ATTEMPTS - 1:
+                raise
+
+
+def _assign_and_save(instance, field, save, value):
+    setattr(instance, field, value)
+    return save()
+
+
+def save_unique(instance, field, base, separator="-", save=None):
+    """Save `instance` with a free `field` value derived from `base`."""
+    return write_unique(
+        type(instance),
+        field,
+        base,
+        partial(_assign_and_save, instance, field, save or instance.save),
+        separator,
+        exclude_pk=instance.pk,
+    )
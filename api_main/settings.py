@@ -127,6 +127,47 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Cursor pagination (api_app.pagination.KeysetCursorPagination)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 24))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 100))
+
+# Seconds a /api/products/facets/ result is cached per query string
+PRODUCT_FACETS_CACHE_TIMEOUT = int(os.getenv("PRODUCT_FACETS_CACHE_TIMEOUT", 300))
+
+# Response cache. Local-memory by default; set CACHE_BACKEND to
+# "django.core.cache.backends.filebased.FileBasedCache" and CACHE_LOCATION
+# to a directory to share it between worker processes.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "furnivibe"),
+    }
+}
+
+# Seconds a serialized product list page / detail stays cached
+PRODUCT_CACHE_TIMEOUT = int(os.getenv("PRODUCT_CACHE_TIMEOUT", 600))
+
+# Image derivatives (api_app.images): generated after upload in a
+# background process pool. Set IMAGE_DERIVATIVES_ASYNC=0 to generate inline.
+IMAGE_DERIVATIVES_ASYNC = os.getenv("IMAGE_DERIVATIVES_ASYNC", "1") == "1"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_DERIVATIVE_SIZES = {"thumb": 320, "medium": 960}
+
+# Seconds an untouched guest cart (api_app.guest_carts) is kept in the cache;
+# use a shared CACHE_BACKEND when running several worker processes.
+GUEST_CART_TIMEOUT = int(os.getenv("GUEST_CART_TIMEOUT", 60 * 60 * 24 * 30))
+
+# Age in days after which purge_carts removes checked-out / deactivated carts
+# and active carts nobody has touched
+CART_INACTIVE_RETENTION_DAYS = int(os.getenv("CART_INACTIVE_RETENTION_DAYS", 30))
+CART_IDLE_DAYS = int(os.getenv("CART_IDLE_DAYS", 90))
+
+# Minutes stock stays reserved for a cart after checkout starts
+# (api_app.reservations); expired rows are removed by sweep_reservations.
+CHECKOUT_RESERVATION_MINUTES = int(os.getenv("CHECKOUT_RESERVATION_MINUTES", 15))
+
 
 
 